@@ -0,0 +1,62 @@
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from contentcache import ContentCache
+from gencontent import parse_page
+from manifest import hash_file
+
+
+def synthetic_page(i, sections):
+    parts = [f"# Page {i}"]
+    for j in range(sections):
+        parts.append(f"## Section {j}")
+        parts.append(
+            f"Some **bold** text, some _italic_ text and a [link](/pages/{j}) "
+            f"with `inline code` in paragraph {j} of page {i}."
+        )
+        parts.append("\n".join(f"- item {k} with [a link](/x/{k})" for k in range(5)))
+        parts.append("> a quoted\n> passage")
+        parts.append("```\ndef f():\n    return 1\n```")
+    return "\n\n".join(parts)
+
+
+def main():
+    pages = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    sections = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = []
+        for i in range(pages):
+            path = os.path.join(tmp, f"page{i}.md")
+            with open(path, "w") as f:
+                f.write(synthetic_page(i, sections))
+            paths.append(path)
+        hashes = [hash_file(path) for path in paths]
+        cache = ContentCache(os.path.join(tmp, "cache"))
+
+        start = time.perf_counter()
+        rendered = []
+        for path in paths:
+            title, node = parse_page(path)
+            rendered.append((title, node.to_html()))
+        parse_elapsed = time.perf_counter() - start
+        for source_hash, (title, html) in zip(hashes, rendered):
+            cache.put(source_hash, title, html)
+
+        start = time.perf_counter()
+        for source_hash in hashes:
+            if cache.get(source_hash) is None:
+                raise AssertionError("cache miss")
+        load_elapsed = time.perf_counter() - start
+
+    print(f"{pages} pages x {sections} sections")
+    print(f"parse + render:  {parse_elapsed * 1000:9.1f} ms")
+    print(f"load from cache: {load_elapsed * 1000:9.1f} ms")
+    print(f"speedup:         {parse_elapsed / load_elapsed:9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from htmlnode import LeafNode, ParentNode
+
+
+def recursive_to_html(node):
+    # The renderer ParentNode.to_html used before the explicit-stack walk.
+    if isinstance(node, LeafNode):
+        return node.to_html()
+    children_html = ""
+    for child in node.children:
+        children_html += recursive_to_html(child)
+    return f"<{node.tag}{node.props_to_html()}>{children_html}</{node.tag}>"
+
+
+def recursive_iter_html(node):
+    if isinstance(node, LeafNode):
+        yield node.to_html()
+        return
+    yield f"<{node.tag}{node.props_to_html()}>"
+    for child in node.children:
+        yield from recursive_iter_html(child)
+    yield f"</{node.tag}>"
+
+
+def wide_tree(width):
+    items = [
+        ParentNode("li", [LeafNode(None, "item "), LeafNode("a", str(i), {"href": "/x"})])
+        for i in range(width)
+    ]
+    return ParentNode("div", [ParentNode("ul", items)])
+
+
+def deep_tree(depth):
+    node = LeafNode("b", "leaf")
+    for _ in range(depth):
+        node = ParentNode("blockquote", [LeafNode(None, "text "), node])
+    return node
+
+
+def best_of(func, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run(name, tree, repeat=5):
+    expected = tree.to_html()
+    renderers = [
+        ("iterative to_html", tree.to_html),
+        ("recursive to_html", lambda: recursive_to_html(tree)),
+        ("recursive iter_html", lambda: "".join(recursive_iter_html(tree))),
+    ]
+    for label, func in renderers:
+        try:
+            if func() != expected:
+                raise AssertionError(f"{label} output differs")
+            elapsed = best_of(func, repeat)
+            print(f"{name:<20} {label:<22} {elapsed * 1000:10.2f} ms")
+        except RecursionError:
+            print(f"{name:<20} {label:<22} {'RecursionError':>13}")
+
+
+def main():
+    run("wide 100k", wide_tree(100_000))
+    run("deep 500", deep_tree(500), repeat=50)
+    run("deep 900", deep_tree(900), repeat=50)
+    run("deep 100k", deep_tree(100_000))
+
+
+if __name__ == "__main__":
+    main()
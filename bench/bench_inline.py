@@ -0,0 +1,74 @@
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from inline_markdown import (
+    split_nodes_delimiter,
+    split_nodes_image,
+    split_nodes_link,
+    text_to_textnodes,
+)
+from textnode import TextNode, TextType
+
+
+def chained_text_to_textnodes(text):
+    # The five-pass pipeline text_to_textnodes used before the scanner.
+    nodes = [TextNode(text, TextType.TEXT)]
+    nodes = split_nodes_delimiter(nodes, "**", TextType.BOLD)
+    nodes = split_nodes_delimiter(nodes, "_", TextType.ITALIC)
+    nodes = split_nodes_delimiter(nodes, "`", TextType.CODE)
+    nodes = split_nodes_image(nodes)
+    nodes = split_nodes_link(nodes)
+    return nodes
+
+
+def link_heavy(links):
+    return " and ".join(
+        f"see [page number {i}](/docs/page{i}) or ![figure {i}](/img/{i}.png)"
+        for i in range(links)
+    )
+
+
+def mixed(words):
+    pieces = ["plain", "**bold**", "_italic_", "`code`", "[link](/x)"]
+    return " ".join(pieces[i % len(pieces)] for i in range(words))
+
+
+def plain(words):
+    return " ".join("word" for _ in range(words))
+
+
+def best_of(func, text, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(text)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    cases = [
+        ("plain 1k words", plain(1_000), 200),
+        ("mixed 1k tokens", mixed(1_000), 50),
+        ("links 10", link_heavy(10), 500),
+        ("links 100", link_heavy(100), 50),
+        ("links 1000", link_heavy(1_000), 5),
+        ("links 5000", link_heavy(5_000), 3),
+    ]
+    print(f"{'case':<18} {'chained ms':>12} {'single-pass ms':>15} {'speedup':>8}")
+    for name, text, repeat in cases:
+        if chained_text_to_textnodes(text) != text_to_textnodes(text):
+            raise AssertionError(f"{name}: node streams differ")
+        chained = best_of(chained_text_to_textnodes, text, repeat)
+        single = best_of(text_to_textnodes, text, repeat)
+        print(
+            f"{name:<18} {chained * 1000:12.3f} {single * 1000:15.3f} "
+            f"{chained / single:7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
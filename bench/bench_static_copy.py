@@ -0,0 +1,81 @@
+import contextlib
+import io
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCH_DIR, "..", "src"))
+
+from copystatic import COPY_MODES, sync_static
+from corpus import generate_corpus
+from walk import walk_files
+
+
+def copy_files_serial(source_dir_path, dest_dir_path):
+    # The copy sync_static replaced, kept here only to compare against.
+    os.makedirs(dest_dir_path, exist_ok=True)
+    for entry, key in walk_files(source_dir_path):
+        dest_path = os.path.join(dest_dir_path, *key.split("/"))
+        os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+        print(f" * {entry.path} -> {dest_path}")
+        shutil.copy(entry.path, dest_path)
+
+
+def timed(out, func, *args, **kwargs):
+    # Best of three fresh copies; writeback from an earlier run can land in
+    # the middle of any single one.
+    best = float("inf")
+    for _ in range(3):
+        if os.path.exists(out):
+            shutil.rmtree(out)
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            func(*args, **kwargs)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    assets = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    # Keep the output beside the corpus so hardlinks and reflinks can work.
+    with tempfile.TemporaryDirectory(dir=BENCH_DIR) as tmp:
+        root = generate_corpus(os.path.join(tmp, "site"), 1, assets=assets)
+        static = os.path.join(root, "static")
+        out = os.path.join(tmp, "out")
+        total = sum(
+            os.path.getsize(os.path.join(dir_path, name))
+            for dir_path, _, names in os.walk(static)
+            for name in names
+        )
+        print(f"{assets} assets, {total / (1 << 20):.1f} MiB")
+
+        results = [
+            ("shutil.copy, serial", timed(out, copy_files_serial, static, out))
+        ]
+        for mode in COPY_MODES:
+            for threads in (1, None):
+                label = f"{mode}, {'1 thread' if threads == 1 else 'thread pool'}"
+                elapsed = timed(
+                    out, sync_static, static, out, mode=mode, threads=threads
+                )
+                results.append((label, elapsed))
+
+        def resync():
+            previous, _ = sync_static(static, out)
+            start = time.perf_counter()
+            sync_static(static, out, previous)
+            return time.perf_counter() - start
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            results.append(("no-op resync", resync()))
+
+    baseline = results[0][1]
+    for label, elapsed in results:
+        print(f"{label:<26} {elapsed * 1000:9.1f} ms  {baseline / elapsed:6.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+import argparse
+import os
+import random
+import shutil
+
+
+SHAPES = ("mixed", "link-heavy", "list-heavy", "code-heavy", "deep")
+
+TEMPLATE = """<!doctype html>
+<html>
+  <head>
+    <meta charset="utf-8" />
+    <title>{{ Title }}</title>
+    <link href="/index.css" rel="stylesheet" />
+  </head>
+
+  <body>
+    <article>{{ Content }}</article>
+  </body>
+</html>
+"""
+
+WORDS = (
+    "the quick brown fox jumps over lazy dog while elves sing of stars "
+    "and rivers under mountains in the west beyond the sea"
+).split()
+
+
+def sentence(rng, words=12):
+    return " ".join(rng.choice(WORDS) for _ in range(words))
+
+
+def paragraph(rng, links=1):
+    parts = [sentence(rng)]
+    for i in range(links):
+        parts.append(f"[{sentence(rng, 3)}](/pages/{rng.randrange(1000)})")
+        parts.append(sentence(rng, 6))
+    parts.append(f"with **{sentence(rng, 2)}** and _{sentence(rng, 2)}_")
+    parts.append(f"and `{rng.choice(WORDS)}()`.")
+    return " ".join(parts)
+
+
+def unordered_list(rng, items):
+    return "\n".join(
+        f"- {sentence(rng, 5)} [{rng.choice(WORDS)}](/x/{i})" for i in range(items)
+    )
+
+
+def ordered_list(rng, items):
+    return "\n".join(f"{i + 1}. {sentence(rng, 6)}" for i in range(items))
+
+
+def code_block(rng, lines):
+    body = "\n".join(
+        f"    {rng.choice(WORDS)} = {rng.choice(WORDS)}({i})" for i in range(lines)
+    )
+    return f"```\ndef main():\n{body}\n```"
+
+
+def page_markdown(rng, index, shape):
+    blocks = [f"# Page {index}: {sentence(rng, 4)}"]
+    for section in range(6):
+        blocks.append(f"## Section {section}")
+        if shape == "link-heavy":
+            blocks.append(paragraph(rng, links=12))
+            blocks.append(paragraph(rng, links=12))
+        elif shape == "list-heavy":
+            blocks.append(unordered_list(rng, 15))
+            blocks.append(ordered_list(rng, 10))
+        elif shape == "code-heavy":
+            blocks.append(paragraph(rng))
+            blocks.append(code_block(rng, 30))
+        else:
+            blocks.append(paragraph(rng, links=2))
+            blocks.append(unordered_list(rng, 4))
+            blocks.append(f"> {sentence(rng)}\n> {sentence(rng)}")
+            if section % 2 == 0:
+                blocks.append(code_block(rng, 5))
+    return "\n\n".join(blocks) + "\n"
+
+
+def page_dir(index, shape):
+    if shape == "deep":
+        # Ten pages per leaf, eight directory levels with four-way fan-out.
+        parts = []
+        n = index // 10
+        for _ in range(8):
+            parts.append(f"d{n % 4}")
+            n //= 4
+        return os.path.join(*parts, f"page{index}")
+    return os.path.join(f"section{index % 50}", f"page{index}")
+
+
+def generate_corpus(root, pages, shape="mixed", assets=None, seed=0):
+    if shape not in SHAPES:
+        raise ValueError(f"unknown corpus shape: {shape}")
+    rng = random.Random(seed)
+    if os.path.exists(root):
+        shutil.rmtree(root)
+    content = os.path.join(root, "content")
+    static = os.path.join(root, "static")
+
+    os.makedirs(content)
+    with open(os.path.join(content, "index.md"), "w") as f:
+        f.write(page_markdown(rng, 0, shape))
+    for i in range(1, pages):
+        dir_path = os.path.join(content, page_dir(i, shape))
+        os.makedirs(dir_path, exist_ok=True)
+        with open(os.path.join(dir_path, "index.md"), "w") as f:
+            f.write(page_markdown(rng, i, shape))
+
+    if assets is None:
+        assets = max(1, pages // 10)
+    os.makedirs(os.path.join(static, "images"))
+    with open(os.path.join(static, "index.css"), "w") as f:
+        f.write("body { font-family: sans-serif; }\n")
+    for i in range(assets):
+        dir_path = os.path.join(static, "images", f"set{i % 20}")
+        os.makedirs(dir_path, exist_ok=True)
+        with open(os.path.join(dir_path, f"image{i}.png"), "wb") as f:
+            f.write(rng.randbytes(rng.randrange(4096, 65536)))
+
+    with open(os.path.join(root, "template.html"), "w") as f:
+        f.write(TEMPLATE)
+    return root
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic site.")
+    parser.add_argument("root", help="directory to create (replaced if it exists)")
+    parser.add_argument("--pages", type=int, default=1000)
+    parser.add_argument("--shape", choices=SHAPES, default="mixed")
+    parser.add_argument("--assets", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    generate_corpus(args.root, args.pages, args.shape, args.assets, args.seed)
+    print(f"Generated {args.pages} {args.shape} pages in {args.root}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,252 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import shutil
+import sys
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCH_DIR, "..", "src"))
+
+import markdown_blocks
+from copystatic import sync_static
+from corpus import SHAPES, generate_corpus
+from gencontent import collect_pages, extract_title, generate_pages_recursive
+from htmlnode import ParentNode
+from inline_markdown import text_to_textnodes
+from markdown_blocks import iter_blocks, lines_to_html_node
+from template import load_template
+
+
+CACHE_DIR = os.path.join(BENCH_DIR, ".cache")
+DEFAULT_BASELINE = os.path.join(BENCH_DIR, "baseline.json")
+STAGES = (
+    "walk",
+    "sync_static",
+    "resync_static",
+    "read",
+    "markdown_to_blocks",
+    "text_to_textnodes",
+    "html_nodes",
+    "to_html",
+    "template",
+    "write",
+    "full_build",
+)
+
+
+class Timer:
+    def __init__(self, repeat):
+        self.repeat = repeat
+        self.stages = {}
+
+    def time(self, name, func):
+        # Best of N runs, so one noisy run doesn't look like a regression.
+        best = float("inf")
+        result = None
+        for _ in range(self.repeat):
+            start = time.perf_counter()
+            result = func()
+            best = min(best, time.perf_counter() - start)
+        self.stages[name] = best
+        return result
+
+
+def quiet(func, *args):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return func(*args)
+
+
+def record_inline_inputs(blocks):
+    # The block helpers feed text_to_textnodes; capture exactly what they
+    # pass so the inline stage can be timed on its own.
+    inputs = []
+
+    def recording(text):
+        inputs.append(text)
+        return text_to_textnodes(text)
+
+    markdown_blocks.text_to_textnodes = recording
+    try:
+        for block_type, lines in blocks:
+            lines_to_html_node(block_type, lines)
+    finally:
+        markdown_blocks.text_to_textnodes = text_to_textnodes
+    return inputs
+
+
+def run_stages(root, out, repeat, basepath="/"):
+    content = os.path.join(root, "content")
+    static = os.path.join(root, "static")
+    template = load_template(os.path.join(root, "template.html"))
+    timer = Timer(repeat)
+
+    pages = timer.time("walk", lambda: collect_pages(content, out))
+
+    # The static copy main() does: sync_static into an empty output, then
+    # the no-op sync of an unchanged tree that most rebuilds are.
+    def copy_static():
+        if os.path.exists(out):
+            shutil.rmtree(out)
+        os.makedirs(os.path.dirname(out), exist_ok=True)
+        return quiet(sync_static, static, out)[0]
+
+    synced = timer.time("sync_static", copy_static)
+    timer.time("resync_static", lambda: quiet(sync_static, static, out, synced))
+
+    def read():
+        sources = []
+        for from_path, _ in pages:
+            with open(from_path, "r") as f:
+                sources.append(f.read())
+        return sources
+
+    sources = timer.time("read", read)
+    documents = timer.time(
+        "markdown_to_blocks", lambda: [list(iter_blocks(md)) for md in sources]
+    )
+    blocks = [block for document in documents for block in document]
+    inline_inputs = record_inline_inputs(blocks)
+    timer.time(
+        "text_to_textnodes", lambda: [text_to_textnodes(t) for t in inline_inputs]
+    )
+    trees = timer.time(
+        "html_nodes",
+        lambda: [
+            ParentNode("div", [lines_to_html_node(*block) for block in document])
+            for document in documents
+        ],
+    )
+    htmls = timer.time("to_html", lambda: [tree.to_html() for tree in trees])
+    titles = [extract_title(md) for md in sources]
+    rendered = timer.time(
+        "template",
+        lambda: [
+            template.render(title, html, basepath)
+            for title, html in zip(titles, htmls)
+        ],
+    )
+
+    def write():
+        for (_, dest_path), page in zip(pages, rendered):
+            os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+            with open(dest_path, "w") as f:
+                f.write(page)
+
+    timer.time("write", write)
+
+    def full_build():
+        build_out = out + "-full"
+        if os.path.exists(build_out):
+            shutil.rmtree(build_out)
+        quiet(
+            generate_pages_recursive,
+            content,
+            template.path,
+            build_out,
+            basepath,
+        )
+
+    timer.time("full_build", full_build)
+    return len(pages), timer.stages
+
+
+def compare(results, baseline, threshold, min_delta):
+    regressions = []
+    print(f"{'stage':<20} {'seconds':>10} {'baseline':>10} {'change':>9}")
+    for stage in STAGES:
+        current = results["stages"][stage]
+        previous = None if baseline is None else baseline["stages"].get(stage)
+        if previous is None:
+            print(f"{stage:<20} {current:10.4f} {'-':>10} {'-':>9}")
+            continue
+        change = (current - previous) / previous if previous > 0 else 0.0
+        flag = ""
+        if change > threshold and current - previous > min_delta:
+            flag = "  REGRESSION"
+            regressions.append(stage)
+        print(f"{stage:<20} {current:10.4f} {previous:10.4f} {change:+8.1%}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the site generator.")
+    parser.add_argument("--pages", type=int, default=1000)
+    parser.add_argument("--shape", choices=SHAPES, default="mixed")
+    parser.add_argument(
+        "--corpus", help="existing site root to benchmark instead of a synthetic one"
+    )
+    parser.add_argument(
+        "--regenerate", action="store_true", help="rebuild the synthetic corpus"
+    )
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", help="where to write the JSON results")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument(
+        "--save-baseline",
+        action="store_true",
+        help="store these results as the baseline for this corpus",
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.15,
+        help="relative slowdown that counts as a regression (default: 0.15)",
+    )
+    parser.add_argument(
+        "--min-delta",
+        type=float,
+        default=0.005,
+        help="ignore slowdowns smaller than this many seconds (default: 0.005)",
+    )
+    args = parser.parse_args()
+
+    if args.corpus is not None:
+        root = args.corpus
+        name = f"corpus-{os.path.basename(os.path.normpath(root))}"
+    else:
+        name = f"{args.shape}-{args.pages}"
+        root = os.path.join(CACHE_DIR, "corpus", name)
+        if args.regenerate or not os.path.exists(root):
+            print(f"Generating {name} corpus...")
+            generate_corpus(root, args.pages, args.shape)
+
+    out = os.path.join(CACHE_DIR, "out", name)
+    pages, stages = run_stages(root, out, args.repeat)
+    results = {
+        "name": name,
+        "pages": pages,
+        "repeat": args.repeat,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "stages": stages,
+    }
+
+    output = args.output or os.path.join(CACHE_DIR, f"results-{name}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(results, f, indent=2, sort_keys=True)
+
+    baselines = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, "r") as f:
+            baselines = json.load(f)
+    print(f"{name}: {pages} pages, best of {args.repeat}")
+    regressions = compare(results, baselines.get(name), args.threshold, args.min_delta)
+    print(f"Results written to {output}")
+
+    if args.save_baseline:
+        baselines[name] = results
+        with open(args.baseline, "w") as f:
+            json.dump(baselines, f, indent=2, sort_keys=True)
+        print(f"Baseline for {name} saved to {args.baseline}")
+    elif regressions:
+        print(f"Regressions in: {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
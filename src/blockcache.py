@@ -0,0 +1,111 @@
+import hashlib
+import json
+import os
+from collections import OrderedDict
+
+from markdown_blocks import PARSER_VERSION
+
+
+BLOCK_CACHE_VERSION = 1
+
+
+class BlockCache:
+    # Content-addressed LRU map from a block's markdown to its rendered HTML,
+    # bounded by the total length of the cached HTML in characters.
+    def __init__(self, max_size=64 * 1024 * 1024, path=None):
+        self.max_size = max_size
+        self.path = path
+        self.entries = OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.added = {}
+        if path is not None:
+            self.load()
+
+    def key(self, text):
+        return hashlib.blake2b(text.encode(), digest_size=16).hexdigest()
+
+    def get(self, key):
+        html = self.entries.get(key)
+        if html is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return html
+
+    def put(self, key, html):
+        if len(html) > self.max_size:
+            return
+        old = self.entries.pop(key, None)
+        if old is not None:
+            self.size -= len(old)
+        self.entries[key] = html
+        self.size += len(html)
+        self.added[key] = html
+        while self.size > self.max_size:
+            _, evicted = self.entries.popitem(last=False)
+            self.size -= len(evicted)
+            self.evictions += 1
+
+    def drain(self):
+        # Hands entries and counters gathered in a worker process back to
+        # the parent's cache, then starts counting afresh.
+        added = self.added
+        stats = (self.hits, self.misses, self.evictions)
+        self.added = {}
+        self.hits = self.misses = self.evictions = 0
+        return added, stats
+
+    def absorb(self, drained):
+        added, stats = drained
+        for key, html in added.items():
+            self.put(key, html)
+        hits, misses, evictions = stats
+        self.hits += hits
+        self.misses += misses
+        self.evictions += evictions
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if (
+            data.get("version") != BLOCK_CACHE_VERSION
+            or data.get("parser") != PARSER_VERSION
+        ):
+            return
+        for key, html in data.get("entries", []):
+            self.put(key, html)
+        self.added = {}
+        self.evictions = 0
+
+    def save(self):
+        dir_path = os.path.dirname(self.path)
+        if dir_path != "":
+            os.makedirs(dir_path, exist_ok=True)
+        # Oldest first, so the LRU order survives a reload.
+        data = {
+            "version": BLOCK_CACHE_VERSION,
+            "parser": PARSER_VERSION,
+            "entries": list(self.entries.items()),
+        }
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(data, f, separators=(",", ":"))
+        os.replace(tmp_path, self.path)
+
+    def report(self):
+        lookups = self.hits + self.misses
+        rate = 100 * self.hits / lookups if lookups else 0.0
+        return (
+            f"Block cache: {self.hits} hits, {self.misses} misses ({rate:.1f}% hit rate), "
+            f"{self.evictions} evictions, {len(self.entries)} entries "
+            f"({self.size // 1024}K characters)"
+        )
@@ -0,0 +1,137 @@
+import hashlib
+import os
+
+from contentcache import read_chunks
+from markdown_blocks import PARSER_VERSION
+
+
+class BuildCache:
+    # Rendered pages addressed by everything that goes into them: the source
+    # and template hashes, the parser version and the basepath. Entries are
+    # plain files, so the directory can be saved and restored between CI
+    # runs. A hit bumps the entry's mtime, which gc() uses as its LRU order.
+    def __init__(self, dir_path, max_size=512 * 1024 * 1024):
+        self.dir_path = dir_path
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self.bytes_saved = 0
+
+    def key(self, source_hash, template_hash, basepath):
+        parts = ("page", source_hash, template_hash, str(PARSER_VERSION), basepath)
+        return hashlib.sha256("\0".join(parts).encode()).hexdigest()
+
+    def entry_path(self, key):
+        return os.path.join(self.dir_path, key[:2], key)
+
+    def get(self, key):
+        path = self.entry_path(key)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            # Evicted by a concurrent gc after the read; the data is fine.
+            pass
+        self.hits += 1
+        self.bytes_saved += len(data)
+        return data.decode()
+
+    def stream(self, key):
+        # Like get, but the page comes as chunks read on demand.
+        path = self.entry_path(key)
+        try:
+            f = open(path, "rb")
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            # Evicted by a concurrent gc after the open; f still reads it.
+            pass
+        self.hits += 1
+        self.bytes_saved += os.fstat(f.fileno()).st_size
+        return read_chunks(f)
+
+    def put(self, key, page):
+        for _ in self.tee(key, [page]):
+            pass
+
+    def tee(self, key, fragments):
+        # Passes the page fragments through while writing them to the entry,
+        # which only appears once the last one has gone by.
+        path = self.entry_path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                for fragment in fragments:
+                    f.write(fragment.encode())
+                    yield fragment
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def entries(self):
+        entries = []
+        if not os.path.isdir(self.dir_path):
+            return entries
+        for prefix in os.listdir(self.dir_path):
+            dir_path = os.path.join(self.dir_path, prefix)
+            if not os.path.isdir(dir_path):
+                continue
+            with os.scandir(dir_path) as scanned:
+                for entry in scanned:
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime_ns, stat.st_size, entry.path))
+        return entries
+
+    def gc(self, max_size=None):
+        # Evicts least recently used entries until the total fits. Returns
+        # the number of entries and bytes removed.
+        if max_size is None:
+            max_size = self.max_size
+        entries = sorted(self.entries())
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        freed = 0
+        for _, size, path in entries:
+            if total - freed <= max_size:
+                break
+            try:
+                os.remove(path)
+                os.rmdir(os.path.dirname(path))
+            except FileNotFoundError:
+                pass
+            except OSError:
+                # The prefix directory still holds other entries.
+                pass
+            removed += 1
+            freed += size
+        return removed, freed
+
+    def drain(self):
+        stats = (self.hits, self.misses, self.bytes_saved)
+        self.hits = self.misses = self.bytes_saved = 0
+        return stats
+
+    def absorb(self, stats):
+        hits, misses, bytes_saved = stats
+        self.hits += hits
+        self.misses += misses
+        self.bytes_saved += bytes_saved
+
+    def report(self):
+        lookups = self.hits + self.misses
+        rate = 100 * self.hits / lookups if lookups else 0.0
+        return (
+            f"Build cache: {self.hits} hits, {self.misses} misses "
+            f"({rate:.1f}% hit rate), {self.bytes_saved // 1024}K of rendered "
+            "pages reused"
+        )
@@ -0,0 +1,112 @@
+import codecs
+import os
+import shutil
+
+from markdown_blocks import PARSER_VERSION
+
+
+class ContentCache:
+    # Rendered content (title and body HTML) per markdown source, stored as
+    # "<title>\n<html>" in UTF-8 under the source hash and parser version, so
+    # a page only needs re-parsing when its source or the parser changes.
+    def __init__(self, dir_path):
+        self.root_path = dir_path
+        self.dir_path = os.path.join(dir_path, f"v{PARSER_VERSION}")
+        self.hits = 0
+        self.misses = 0
+        self.pruned = 0
+
+    def entry_path(self, source_hash):
+        return os.path.join(self.dir_path, source_hash[:2], source_hash)
+
+    def get(self, source_hash):
+        try:
+            with open(self.entry_path(source_hash), "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        self.hits += 1
+        title, _, html = data.decode().partition("\n")
+        return title, html
+
+    def stream(self, source_hash):
+        # Like get, but the HTML comes as chunks read from the entry on
+        # demand instead of one string.
+        try:
+            f = open(self.entry_path(source_hash), "rb")
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        self.hits += 1
+        title = f.readline()[:-1].decode()
+        return title, read_chunks(f)
+
+    def put(self, source_hash, title, html):
+        for _ in self.tee(source_hash, title, [html]):
+            pass
+
+    def tee(self, source_hash, title, fragments):
+        # Passes the HTML fragments through while writing them to the entry,
+        # which only appears once the last one has gone by.
+        path = self.entry_path(source_hash)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Workers may race on identical sources; a per-process temp file and
+        # an atomic replace keep readers from ever seeing a partial entry.
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                f.write(title.encode() + b"\n")
+                for fragment in fragments:
+                    f.write(fragment.encode())
+                    yield fragment
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def prune(self, keep):
+        # Every edit adds an entry under the new source hash, so after a
+        # build everything but the hashes in keep (the manifest's sources)
+        # goes, along with whole directories of other parser versions.
+        if not os.path.isdir(self.root_path):
+            return
+        for name in os.listdir(self.root_path):
+            path = os.path.join(self.root_path, name)
+            if path != self.dir_path and name[:1] == "v" and name[1:].isdigit():
+                shutil.rmtree(path)
+        if not os.path.isdir(self.dir_path):
+            return
+        for prefix in os.listdir(self.dir_path):
+            prefix_path = os.path.join(self.dir_path, prefix)
+            for name in os.listdir(prefix_path):
+                if name not in keep:
+                    os.remove(os.path.join(prefix_path, name))
+                    self.pruned += 1
+            if not os.listdir(prefix_path):
+                os.rmdir(prefix_path)
+
+    def drain(self):
+        stats = (self.hits, self.misses)
+        self.hits = self.misses = 0
+        return stats
+
+    def absorb(self, stats):
+        hits, misses = stats
+        self.hits += hits
+        self.misses += misses
+
+    def report(self):
+        return (
+            f"Content cache: {self.hits} hits, {self.misses} misses, "
+            f"{self.pruned} stale entries removed"
+        )
+
+
+def read_chunks(f, size=1 << 16):
+    # Decodes an open binary file as UTF-8, one chunk at a time.
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    with f:
+        for chunk in iter(lambda: f.read(size), b""):
+            yield decoder.decode(chunk)
+    yield decoder.decode(b"", final=True)
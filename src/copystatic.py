@@ -1,16 +1,206 @@
 import os
 import shutil
+from concurrent.futures import ThreadPoolExecutor
 
+from manifest import hash_file
+from shard import select_shard
+from tracing import span
+from walk import walk_files
 
-def copy_files_recursive(source_dir_path, dest_dir_path):
-    if not os.path.exists(dest_dir_path):
-        os.mkdir(dest_dir_path)
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
 
-    for filename in os.listdir(source_dir_path):
-        from_path = os.path.join(source_dir_path, filename)
-        dest_path = os.path.join(dest_dir_path, filename)
-        print(f" * {from_path} -> {dest_path}")
-        if os.path.isfile(from_path):
-            shutil.copy(from_path, dest_path)
-        else:
-            copy_files_recursive(from_path, dest_path)
+
+COPY_MODES = ("copy", "hardlink", "reflink")
+COPY_BUFFER_SIZE = 1 << 20
+# ioctl(dst, FICLONE, src) shares src's extents with dst (Btrfs, XFS, ...).
+FICLONE = 0x40049409
+
+
+class SyncStats:
+    def __init__(self):
+        self.copied = 0
+        self.skipped = 0
+        self.deleted = 0
+
+    def report(self):
+        return (
+            f"Static files: {self.copied} copied, {self.skipped} unchanged, "
+            f"{self.deleted} deleted"
+        )
+
+
+def sync_static(
+    source_dir_path,
+    dest_dir_path,
+    previous=(),
+    checksum=False,
+    trace=None,
+    mode="copy",
+    threads=None,
+    shard=None,
+):
+    if mode not in COPY_MODES:
+        raise ValueError(f"unknown copy mode: {mode}")
+    # The output directory also holds generated pages, so only files this
+    # sync put there last time (previous) are candidates for deletion.
+    stats = SyncStats()
+    files = walk_static(source_dir_path, dest_dir_path, trace)
+    files = select_shard(files, [key for _, _, key in files], shard)
+    os.makedirs(dest_dir_path, exist_ok=True)
+    for dest_dir in sorted(set(os.path.dirname(dest) for _, dest, _ in files)):
+        os.makedirs(dest_dir, exist_ok=True)
+
+    def sync_file(entry):
+        from_path, dest_path, _ = entry
+        if is_unchanged(from_path, dest_path, checksum):
+            return False
+        with span(trace, "copy_file", "static", path=from_path):
+            copy_file(from_path, dest_path, mode)
+        return True
+
+    # Copies spend their time in the kernel with the GIL released, so a
+    # thread pool keeps several of them in flight at once.
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        for (from_path, dest_path, _), copied in zip(
+            files, executor.map(sync_file, files)
+        ):
+            if copied:
+                print(f" * {from_path} -> {dest_path}")
+                stats.copied += 1
+            else:
+                stats.skipped += 1
+
+    synced = sorted(key for _, _, key in files)
+    for dest_key in sorted(set(previous) - set(synced)):
+        remove_output(dest_dir_path, dest_key)
+        stats.deleted += 1
+    return synced, stats
+
+
+def walk_static(source_dir_path, dest_dir_path, trace=None):
+    with span(trace, "walk_static", "static", path=source_dir_path):
+        return [
+            (entry.path, os.path.join(dest_dir_path, *key.split("/")), key)
+            for entry, key in walk_files(source_dir_path)
+        ]
+
+
+def is_unchanged(from_path, dest_path, checksum=False):
+    try:
+        dest_stat = os.stat(dest_path)
+    except FileNotFoundError:
+        return False
+    from_stat = os.stat(from_path)
+    if from_stat.st_size != dest_stat.st_size:
+        return False
+    if checksum:
+        return hash_file(from_path) == hash_file(dest_path)
+    return from_stat.st_mtime_ns == dest_stat.st_mtime_ns
+
+
+def copy_file(from_path, dest_path, mode="copy"):
+    # The new file is built beside the old one and renamed over it. Writing
+    # into an existing output could write through a hardlink into static/.
+    tmp_path = dest_path + ".sitegen-tmp"
+    try:
+        if mode == "hardlink" and link_file(from_path, tmp_path):
+            os.replace(tmp_path, dest_path)
+            return
+        with open(from_path, "rb", buffering=0) as src, open(
+            tmp_path, "wb", buffering=0
+        ) as dst:
+            if mode != "reflink" or not clone_file(src.fileno(), dst.fileno()):
+                copy_contents(src, dst)
+        # Only the times are carried over, not the permission bits, so the
+        # next sync can tell the file is unchanged.
+        stat = os.stat(from_path)
+        os.utime(tmp_path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        os.replace(tmp_path, dest_path)
+    except BaseException:
+        if os.path.lexists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def link_file(from_path, tmp_path):
+    try:
+        os.link(from_path, tmp_path)
+    except OSError:
+        # Different filesystems, or one without hardlinks.
+        return False
+    return True
+
+
+def clone_file(src_fd, dst_fd):
+    if fcntl is None:
+        return False
+    try:
+        fcntl.ioctl(dst_fd, FICLONE, src_fd)
+    except OSError:
+        # Different filesystems, or one without copy-on-write extents.
+        return False
+    return True
+
+
+def copy_contents(src, dst):
+    # copy_file_range copies inside the kernel (and server-side on NFS and
+    # SMB); sendfile at least skips the round trip through user space. Both
+    # fall back to a plain read/write loop where they are unsupported.
+    size = os.fstat(src.fileno()).st_size
+    offset = 0
+    for name in ("copy_file_range", "sendfile"):
+        if offset >= size or not hasattr(os, name):
+            continue
+        try:
+            while offset < size:
+                if name == "copy_file_range":
+                    sent = os.copy_file_range(
+                        src.fileno(), dst.fileno(), size - offset, offset, offset
+                    )
+                else:
+                    sent = os.sendfile(dst.fileno(), src.fileno(), offset, size - offset)
+                if sent == 0:
+                    break
+                offset += sent
+        except OSError:
+            if offset > 0:
+                raise
+    src.seek(offset)
+    dst.seek(offset)
+    shutil.copyfileobj(src, dst, COPY_BUFFER_SIZE)
+
+
+def remove_unowned_outputs(dest_dir_path, owned):
+    # Removes every file under dest_dir_path whose key is not in owned: left
+    # there by an older build, put there before there was a manifest, or
+    # belonging to another shard. Returns how many were removed.
+    removed = 0
+    for dir_path, dir_names, filenames in os.walk(dest_dir_path):
+        dir_names.sort()
+        for filename in sorted(filenames):
+            path = os.path.join(dir_path, filename)
+            key = os.path.relpath(path, dest_dir_path).replace(os.sep, "/")
+            if key not in owned:
+                remove_output(dest_dir_path, key)
+                removed += 1
+    return removed
+
+
+def remove_output(dest_dir_path, dest_key):
+    dest_path = os.path.join(dest_dir_path, dest_key)
+    print(f" * removing {dest_path}")
+    if os.path.exists(dest_path):
+        os.remove(dest_path)
+    # Drop directories the file leaves empty, but never the output root.
+    dir_path = os.path.dirname(dest_path)
+    root = os.path.abspath(dest_dir_path)
+    while (
+        os.path.isdir(dir_path)
+        and os.path.abspath(dir_path) != root
+        and not os.listdir(dir_path)
+    ):
+        os.rmdir(dir_path)
+        dir_path = os.path.dirname(dir_path)
@@ -0,0 +1,72 @@
+import json
+import os
+
+from manifest import hash_file
+
+
+DEPLOY_MANIFEST_VERSION = 1
+
+
+def index_outputs(dest_dir_path, previous):
+    # Size, mtime and SHA-256 of every file under the output directory,
+    # keyed by its posix path relative to it. Files whose size and mtime
+    # match the previous index keep their recorded hash without a read;
+    # unchanged outputs are never rewritten, so that is nearly all of them.
+    outputs = {}
+    index_dir(dest_dir_path, "", previous, outputs)
+    return outputs
+
+
+def index_dir(dir_path, prefix, previous, outputs):
+    with os.scandir(dir_path) as entries:
+        for entry in entries:
+            key = prefix + entry.name
+            if entry.is_dir():
+                index_dir(entry.path, key + "/", previous, outputs)
+                continue
+            stat = entry.stat()
+            old = previous.get(key)
+            if (
+                old is not None
+                and old[0] == stat.st_size
+                and old[1] == stat.st_mtime_ns
+            ):
+                digest = old[2]
+            else:
+                digest = hash_file(entry.path)
+            outputs[key] = [stat.st_size, stat.st_mtime_ns, digest]
+
+
+def diff_outputs(previous, current):
+    added = []
+    modified = []
+    deleted = []
+    for key in sorted(current):
+        digest = current[key][2]
+        if key not in previous:
+            added.append({"path": key, "sha256": digest})
+        elif previous[key][2] != digest:
+            modified.append({"path": key, "sha256": digest})
+    for key in sorted(previous):
+        if key not in current:
+            deleted.append({"path": key, "sha256": previous[key][2]})
+    return {"added": added, "modified": modified, "deleted": deleted}
+
+
+def save_deploy_manifest(path, changes):
+    dir_path = os.path.dirname(path)
+    if dir_path != "":
+        os.makedirs(dir_path, exist_ok=True)
+    data = {"version": DEPLOY_MANIFEST_VERSION}
+    data.update(changes)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(data, f, indent=1)
+    os.replace(tmp_path, path)
+
+
+def deploy_report(changes):
+    return (
+        f"Deploy changes: {len(changes['added'])} added, "
+        f"{len(changes['modified'])} modified, {len(changes['deleted'])} deleted"
+    )
@@ -0,0 +1,459 @@
+import asyncio
+import gzip
+import hashlib
+import html
+import mimetypes
+import os
+import threading
+from collections import OrderedDict
+from http import HTTPStatus
+from pathlib import Path
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from gencontent import parse_page
+from template import load_template
+from walk import IGNORE_FILE_NAME, load_ignore_rules
+from watch import changed_paths, snapshot
+
+
+COMPRESSIBLE_TYPES = ("text/", "application/javascript", "application/json")
+# Below this, gzip's header and the extra round of work outweigh the savings.
+MIN_GZIP_SIZE = 256
+EVENTS_PATH = "/__sitegen/events"
+# Injected into every rendered page: reload when the server says this page
+# changed. EventSource reconnects by itself if the server restarts.
+LIVE_RELOAD_SCRIPT = (
+    "<script>new EventSource(" + repr(EVENTS_PATH) + " + '?page=' + "
+    "encodeURIComponent(location.pathname)).onmessage = function () "
+    "{ location.reload(); };</script>"
+)
+# Idle event streams get a comment this often, which is how a client that
+# went away without closing its connection is noticed.
+KEEPALIVE_INTERVAL = 15
+
+
+class CachedResponse:
+    def __init__(self, body, content_type):
+        self.body = body
+        self.content_type = content_type
+        self.etag = '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+        self.gzipped = None
+        compressible = content_type.startswith(COMPRESSIBLE_TYPES)
+        if compressible and len(body) >= MIN_GZIP_SIZE:
+            # mtime=0 keeps the compressed bytes the same for the same body.
+            self.gzipped = gzip.compress(body, 6, mtime=0)
+
+    def size(self):
+        return len(self.body) + (len(self.gzipped) if self.gzipped else 0)
+
+
+class RenderCache:
+    # LRU of rendered pages and static files, bounded by their total size in
+    # bytes. Each entry is stored with the version (sizes and mtimes) of the
+    # files it was built from and is dropped once they no longer match.
+    def __init__(self, max_size=64 * 1024 * 1024):
+        self.max_size = max_size
+        self.entries = OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def get(self, key, version):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None or entry[0] != version:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key, version, response):
+        size = response.size()
+        if size > self.max_size:
+            return
+        with self.lock:
+            old = self.entries.pop(key, None)
+            if old is not None:
+                self.size -= old[1].size()
+            self.entries[key] = (version, response)
+            self.size += size
+            while self.size > self.max_size:
+                _, (_, evicted) = self.entries.popitem(last=False)
+                self.size -= evicted.size()
+
+
+def file_version(*paths):
+    version = []
+    for path in paths:
+        stat = os.stat(path)
+        version.append((stat.st_size, stat.st_mtime_ns))
+    return tuple(version)
+
+
+class DevSite:
+    # Maps request paths onto the site the way a build lays out docs/:
+    # content/a/b.md is /a/b.html, content/a/index.md is also /a/, and
+    # anything else comes from static/.
+    def __init__(
+        self,
+        dir_path_content,
+        dir_path_static,
+        template_path,
+        basepath,
+        cache,
+        live_reload=False,
+    ):
+        self.dir_path_content = dir_path_content
+        self.dir_path_static = dir_path_static
+        self.template_path = template_path
+        self.basepath = basepath
+        self.cache = cache
+        self.live_reload = live_reload
+        # Read once, so a changed .sitegenignore needs a restart.
+        self.content_rules = load_ignore_rules(dir_path_content)
+        self.static_rules = load_ignore_rules(dir_path_static)
+
+    def resolve(self, url_path):
+        # Returns ("page" | "static" | "redirect", path), or None.
+        if not url_path.startswith(self.basepath):
+            return None
+        rel_path = url_path[len(self.basepath) :]
+        # Nothing outside content/ and static/ may be reachable.
+        if (
+            rel_path.startswith("/")
+            or "\\" in rel_path
+            or os.path.splitdrive(rel_path)[0] != ""
+            or any(part in ("..", ".") for part in rel_path.split("/"))
+        ):
+            return None
+        if rel_path == "" or rel_path.endswith("/"):
+            rel_path += "index.html"
+        elif os.path.isdir(os.path.join(self.dir_path_content, rel_path)):
+            return "redirect", url_path + "/"
+        if rel_path.endswith(".html"):
+            key = rel_path[:-5] + ".md"
+            source = os.path.join(self.dir_path_content, key)
+            if os.path.isfile(source) and not self.content_rules.ignores_path(key):
+                return "page", source
+        static = os.path.join(self.dir_path_static, rel_path)
+        if (
+            os.path.isfile(static)
+            and rel_path != IGNORE_FILE_NAME
+            and not self.static_rules.ignores_path(rel_path)
+        ):
+            return "static", static
+        if os.path.isdir(static) and not url_path.endswith("/"):
+            return "redirect", url_path + "/"
+        return None
+
+    def response(self, kind, path):
+        if kind == "page":
+            version = file_version(path, self.template_path)
+        else:
+            version = file_version(path)
+        response = self.cache.get(path, version)
+        if response is None:
+            if kind == "page":
+                response = self.render_page(path)
+            else:
+                response = self.read_static(path)
+            self.cache.put(path, version, response)
+        return response
+
+    def render_page(self, from_path):
+        title, node = parse_page(from_path)
+        template = load_template(self.template_path)
+        page = template.render(title, node.to_html(), self.basepath)
+        if self.live_reload:
+            page = inject_script(page)
+        return CachedResponse(page.encode(), "text/html; charset=utf-8")
+
+    def error_page(self, path, error):
+        page = f"<pre>{html.escape(path)}: {html.escape(error)}</pre>"
+        if self.live_reload:
+            page += LIVE_RELOAD_SCRIPT
+        return page.encode()
+
+    def static_url(self, path):
+        rel_path = Path(os.path.relpath(path, self.dir_path_static)).as_posix()
+        return self.basepath + rel_path
+
+    def read_static(self, path):
+        with open(path, "rb") as f:
+            body = f.read()
+        content_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+        if content_type.startswith("text/"):
+            content_type += "; charset=utf-8"
+        return CachedResponse(body, content_type)
+
+
+def inject_script(page):
+    index = page.rfind("</body>")
+    if index == -1:
+        return page + LIVE_RELOAD_SCRIPT
+    return page[:index] + LIVE_RELOAD_SCRIPT + page[index:]
+
+
+class LiveClient:
+    def __init__(self, page, response):
+        # The page (source path) this client is showing, as it was served.
+        self.page = page
+        self.response = response
+        self.queue = asyncio.Queue()
+
+
+class DevServer:
+    # One asyncio loop serves every connection, so the many idle event
+    # streams of open browser tabs cost a coroutine each, not a thread.
+    # Rendering runs on the loop's default thread pool.
+    def __init__(self, site, poll_interval=0.25, debounce=0.05):
+        self.site = site
+        self.poll_interval = poll_interval
+        self.debounce = debounce
+        self.clients = set()
+
+    async def start(self, host="127.0.0.1", port=8888):
+        self.server = await asyncio.start_server(self.handle, host, port)
+        self.port = self.server.sockets[0].getsockname()[1]
+        if self.site.live_reload:
+            self.watcher = asyncio.create_task(self.watch())
+        return self.server
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                request = await read_request(reader)
+                if request is None:
+                    break
+                method, target, version, headers = request
+                url = urlsplit(target)
+                if method == "GET" and url.path == EVENTS_PATH:
+                    page = parse_qs(url.query).get("page", [""])[0]
+                    await self.stream_events(writer, page)
+                    break
+                keep_alive = await self.respond(writer, method, url, headers)
+                keep_alive = keep_alive and version == "HTTP/1.1"
+                if not keep_alive or headers.get("connection", "") == "close":
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def respond(self, writer, method, url, headers):
+        if method not in ("GET", "HEAD"):
+            write_response(writer, 405, [], b"method not allowed\n")
+            await writer.drain()
+            return False
+        send_body = method == "GET"
+        url_path = unquote(url.path)
+        target = self.site.resolve(url_path)
+        if target is None:
+            body = f"not found: {url_path}\n".encode()
+            write_response(writer, 404, [], body, send_body)
+        elif target[0] == "redirect":
+            write_response(writer, 301, [("Location", target[1])], b"", send_body)
+        else:
+            kind, path = target
+            loop = asyncio.get_running_loop()
+            try:
+                response = await loop.run_in_executor(
+                    None, self.site.response, kind, path
+                )
+            except Exception as e:
+                body = self.site.error_page(path, f"{type(e).__name__}: {e}")
+                content_type = [("Content-Type", "text/html; charset=utf-8")]
+                write_response(writer, 500, content_type, body, send_body)
+            else:
+                write_cached_response(writer, response, headers, send_body)
+        await writer.drain()
+        return True
+
+    async def stream_events(self, writer, url_path):
+        target = self.site.resolve(url_path)
+        if target is None or target[0] != "page":
+            write_response(writer, 404, [], b"no such page\n")
+            await writer.drain()
+            return
+        page = target[1]
+        loop = asyncio.get_running_loop()
+        try:
+            response = await loop.run_in_executor(
+                None, self.site.response, "page", page
+            )
+        except Exception:
+            # Showing an error page; any successful render is a change.
+            response = None
+        client = LiveClient(page, response)
+        writer.write(
+            b"HTTP/1.1 200 OK\r\n"
+            b"Content-Type: text/event-stream\r\n"
+            b"Cache-Control: no-cache\r\n"
+            b"Connection: close\r\n\r\n"
+            b"retry: 1000\n\n"
+        )
+        self.clients.add(client)
+        try:
+            await writer.drain()
+            while True:
+                try:
+                    event = await asyncio.wait_for(
+                        client.queue.get(), KEEPALIVE_INTERVAL
+                    )
+                    writer.write(f"data: {event}\n\n".encode())
+                except asyncio.TimeoutError:
+                    writer.write(b": keepalive\n\n")
+                await writer.drain()
+        finally:
+            self.clients.discard(client)
+
+    async def watch(self):
+        paths = [
+            self.site.dir_path_content,
+            self.site.dir_path_static,
+            self.site.template_path,
+        ]
+        loop = asyncio.get_running_loop()
+        files = await loop.run_in_executor(None, snapshot, paths)
+        changed = set()
+        quiet_since = None
+        while True:
+            # Same polling and debouncing as --watch (see watch.py).
+            delay = self.poll_interval if not changed else self.debounce
+            await asyncio.sleep(delay)
+            current = await loop.run_in_executor(None, snapshot, paths)
+            now = loop.time()
+            new_changes = changed_paths(files, current)
+            files = current
+            if new_changes:
+                changed |= new_changes
+                quiet_since = now
+            elif changed and now - quiet_since >= self.debounce:
+                try:
+                    await self.notify(changed)
+                except Exception as e:
+                    print(f"live reload: {type(e).__name__}: {e}")
+                changed = set()
+
+    async def notify(self, changed):
+        # Only clients whose page renders differently now, or that use a
+        # static file which changed, are told to reload.
+        loop = asyncio.get_running_loop()
+        template_changed = self.site.template_path in changed
+        static_urls = [
+            self.site.static_url(path).encode()
+            for path in changed
+            if path.startswith(os.path.join(self.site.dir_path_static, ""))
+        ]
+        rendered = {}
+        reloaded = 0
+        for client in list(self.clients):
+            stale = False
+            if template_changed or client.page in changed:
+                if client.page not in rendered:
+                    try:
+                        response = await loop.run_in_executor(
+                            None, self.site.response, "page", client.page
+                        )
+                        rendered[client.page] = response.etag
+                    except Exception:
+                        rendered[client.page] = None
+                etag = None if client.response is None else client.response.etag
+                stale = rendered[client.page] != etag or etag is None
+            if not stale and client.response is not None:
+                stale = any(url in client.response.body for url in static_urls)
+            if stale:
+                client.queue.put_nowait("reload")
+                reloaded += 1
+        if reloaded:
+            print(f"live reload: {reloaded} client(s) told to reload")
+
+
+async def read_request(reader):
+    request_line = await reader.readline()
+    if request_line in (b"", b"\r\n", b"\n"):
+        return None
+    parts = request_line.decode("latin-1").split()
+    if len(parts) != 3:
+        raise ValueError("malformed request line")
+    method, target, version = parts
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"", b"\r\n", b"\n"):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+    return method, target, version, headers
+
+
+def write_response(writer, status, headers, body, send_body=True):
+    lines = [f"HTTP/1.1 {status} {HTTPStatus(status).phrase}"]
+    for name, value in headers:
+        lines.append(f"{name}: {value}")
+    if status != 304:
+        if not any(name == "Content-Type" for name, _ in headers):
+            lines.append("Content-Type: text/plain; charset=utf-8")
+        lines.append(f"Content-Length: {len(body)}")
+    writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1"))
+    if send_body and status != 304:
+        writer.write(body)
+
+
+def write_cached_response(writer, response, request_headers, send_body=True):
+    # Revalidate every time; an unchanged page costs a 304 and a stat.
+    headers = [("ETag", response.etag), ("Cache-Control", "no-cache")]
+    if etag_matches(request_headers.get("if-none-match", ""), response.etag):
+        write_response(writer, 304, headers, b"", send_body)
+        return
+    body = response.body
+    headers.append(("Content-Type", response.content_type))
+    if response.gzipped is not None:
+        headers.append(("Vary", "Accept-Encoding"))
+        if accepts_gzip(request_headers.get("accept-encoding", "")):
+            headers.append(("Content-Encoding", "gzip"))
+            body = response.gzipped
+    write_response(writer, 200, headers, body, send_body)
+
+
+def etag_matches(header, etag):
+    for tag in header.split(","):
+        tag = tag.strip()
+        if tag.startswith("W/"):
+            tag = tag[2:]
+        if tag == etag or tag == "*":
+            return True
+    return False
+
+
+def accepts_gzip(header):
+    for coding in header.split(","):
+        name, _, params = coding.partition(";")
+        if name.strip().lower() != "gzip":
+            continue
+        params = params.replace(" ", "")
+        if params.startswith("q="):
+            try:
+                return float(params[2:]) > 0
+            except ValueError:
+                return False
+        return True
+    return False
+
+
+def serve(site, host="127.0.0.1", port=8888):
+    server = DevServer(site)
+
+    async def run():
+        await server.start(host, port)
+        url = f"http://{host}:{server.port}{site.basepath}"
+        reload = " with live reload" if site.live_reload else ""
+        print(f"Serving {site.dir_path_content} at {url}{reload}")
+        await server.server.serve_forever()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        print("Stopped serving")
@@ -0,0 +1,87 @@
+import itertools
+import re
+
+
+FENCE = "---"
+INT_PATTERN = re.compile(r"-?\d+")
+KEY_PATTERN = re.compile(r"([A-Za-z_][\w-]*):(?:\s+(.*))?$")
+
+
+def read_front_matter(lines):
+    # Takes the lines of a page and returns its front matter and the lines
+    # after it. Front matter is a block between two "---" lines at the very
+    # top; without one the page is all body.
+    lines = iter(lines)
+    first = next(lines, None)
+    if first is None:
+        return {}, iter(())
+    if first.rstrip("\n") != FENCE:
+        return {}, itertools.chain([first], lines)
+    block = []
+    for line in lines:
+        if line.rstrip("\n") == FENCE:
+            return parse_front_matter(block), lines
+        block.append(line)
+    raise ValueError("front matter has no closing ---")
+
+
+def split_front_matter(text):
+    # read_front_matter for a page already read into a string.
+    if text.partition("\n")[0] != FENCE:
+        return {}, text
+    meta, lines = read_front_matter(text.splitlines(keepends=True))
+    return meta, "".join(lines)
+
+
+def parse_front_matter(lines):
+    # The YAML most front matter uses: "key: value" per line, where a value
+    # is a string (optionally quoted), true/false, an integer or a [list],
+    # or a list given as "- item" lines below an empty "key:". Dates are
+    # left as strings; ISO dates sort as they should.
+    meta = {}
+    key = None
+    for number, line in enumerate(lines, 1):
+        line = line.rstrip("\n")
+        stripped = line.strip()
+        if stripped == "" or stripped.startswith("#"):
+            continue
+        if stripped.startswith("- ") or stripped == "-":
+            if key is None or not isinstance(meta[key], list):
+                raise ValueError(f"front matter line {number}: list item without a key")
+            meta[key].append(parse_value(stripped[1:]))
+            continue
+        match = KEY_PATTERN.match(line)
+        if match is None:
+            raise ValueError(f"front matter line {number}: expected key: value")
+        key, value = match.group(1), match.group(2)
+        meta[key] = [] if value is None or value.strip() == "" else parse_value(value)
+    return meta
+
+
+def parse_value(text):
+    text = text.strip()
+    if text.startswith("[") and text.endswith("]"):
+        items = text[1:-1].strip()
+        if items == "":
+            return []
+        return [parse_value(item) for item in items.split(",")]
+    if len(text) >= 2 and text[0] == text[-1] and text[0] in "\"'":
+        return text[1:-1]
+    if text in ("true", "false"):
+        return text == "true"
+    if INT_PATTERN.fullmatch(text):
+        return int(text)
+    return text
+
+
+def read_header(lines):
+    # Everything known about a page short of parsing its body: the front
+    # matter, plus the first "# " heading as its title unless the front
+    # matter has one. Stops reading there.
+    meta, lines = read_front_matter(lines)
+    if "title" not in meta:
+        for line in lines:
+            if line.startswith("# "):
+                meta["title"] = line[2:].rstrip("\n")
+                break
+    return meta
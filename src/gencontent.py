@@ -1,48 +1,506 @@
+import hashlib
 import os
+import time
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
+from copystatic import remove_output
+from frontmatter import read_front_matter, read_header, split_front_matter
 from markdown_blocks import markdown_to_html_node
+from manifest import hash_bytes, hash_file
+from shard import select_shard
+from template import Template, load_template
+from tracing import span
+from walk import IGNORE_FILE_NAME, load_ignore_rules, walk_files
 
 
-def generate_pages_recursive(dir_path_content, template_path, dest_dir_path, basepath):
-    for filename in os.listdir(dir_path_content):
-        from_path = os.path.join(dir_path_content, filename)
-        dest_path = os.path.join(dest_dir_path, filename)
-        if os.path.isfile(from_path):
-            dest_path = Path(dest_path).with_suffix(".html")
-            generate_page(from_path, template_path, dest_path, basepath)
+class PageGenerationError(Exception):
+    def __init__(self, failures):
+        self.failures = failures
+        super().__init__(f"{len(failures)} page(s) failed to generate")
+
+
+def generate_pages_recursive(
+    dir_path_content,
+    template_path,
+    dest_dir_path,
+    basepath,
+    manifest=None,
+    jobs=1,
+    block_cache=None,
+    content_cache=None,
+    profile=None,
+    trace=None,
+    changed=None,
+    executor=None,
+    build_cache=None,
+    shard=None,
+):
+    # With changed (source paths known to have changed, e.g. by a watcher)
+    # only those pages are looked at; everything else is taken as current.
+    # With shard (i, N) only the i-th of N size-balanced parts is built, and
+    # the rest count as gone from this shard's output.
+    with span(trace, "collect_pages", "build"):
+        if changed is None:
+            found = collect_pages(dir_path_content, dest_dir_path)
+            keys = [
+                Path(os.path.relpath(from_path, dir_path_content)).as_posix()
+                for from_path, _ in found
+            ]
+            found = select_shard(found, keys, shard)
         else:
-            generate_pages_recursive(from_path, template_path, dest_path, basepath)
+            # The same rules collect_pages walks with: an editor's swap file
+            # or the ignore file itself is no page.
+            rules = load_ignore_rules(dir_path_content)
+            found = []
+            for from_path in sorted(changed):
+                key = Path(os.path.relpath(from_path, dir_path_content)).as_posix()
+                if (
+                    not os.path.isfile(from_path)
+                    or key == IGNORE_FILE_NAME
+                    or rules.ignores_path(key)
+                ):
+                    continue
+                dest_path = page_dest_path(from_path, dir_path_content, dest_dir_path)
+                found.append((from_path, dest_path))
+        pages = [(from_path, dest_path, None) for from_path, dest_path in found]
+    pending = {}
+    if manifest is not None:
+        with span(trace, "check_manifest", "build"):
+            template_hash = hash_file(template_path)
+            basepath_hash = hash_bytes(basepath.encode())
+            stale_pages = []
+            for from_path, dest_path, _ in pages:
+                key = Path(os.path.relpath(from_path, dir_path_content)).as_posix()
+                dest_key = Path(os.path.relpath(dest_path, dest_dir_path)).as_posix()
+                inputs = manifest.page_inputs(
+                    key, from_path, template_hash, basepath_hash
+                )
+                if manifest.is_fresh(key, dest_key, inputs) and os.path.exists(
+                    dest_path
+                ):
+                    manifest.skip(key, inputs)
+                    continue
+                stale_pages.append((from_path, dest_path, inputs["source"]))
+                pending[from_path] = (key, dest_key, inputs)
+            pages = stale_pages
+
+    template = load_template(template_path)
+    with span(trace, "generate_pages", "build", pages=len(pages), jobs=jobs):
+        failures = generate_pages(
+            pages,
+            template,
+            basepath,
+            jobs,
+            block_cache,
+            content_cache,
+            profile,
+            trace,
+            executor,
+            build_cache,
+        )
+
+    if manifest is not None:
+        with span(trace, "prune", "build"):
+            failed = set(from_path for from_path, _ in failures)
+            for from_path, (key, dest_key, inputs) in pending.items():
+                if from_path not in failed:
+                    manifest.record(key, dest_key, inputs)
+            if changed is None:
+                removed = manifest.prune()
+            else:
+                removed = []
+                for from_path in sorted(changed):
+                    if not os.path.exists(from_path):
+                        key = Path(os.path.relpath(from_path, dir_path_content))
+                        dest_key = manifest.forget(key.as_posix())
+                        if dest_key is not None:
+                            removed.append(dest_key)
+            for dest_key in removed:
+                remove_page(dest_dir_path, dest_key)
+
+    if failures:
+        raise PageGenerationError(failures)
+
+
+def generate_pages(
+    pages,
+    template,
+    basepath,
+    jobs=1,
+    block_cache=None,
+    content_cache=None,
+    profile=None,
+    trace=None,
+    executor=None,
+    build_cache=None,
+):
+    collectors = page_collectors(
+        block_cache, content_cache, profile, trace, build_cache
+    )
+    pooled = jobs > 1 and len(pages) > 1
+    if not pooled:
+        results = [generate_page_chunk(pages, template, basepath, **collectors)]
+    elif executor is None:
+        with start_worker_pool(jobs, collectors) as executor:
+            results = run_page_chunks(executor, pages, template, basepath, jobs)
+    else:
+        results = run_page_chunks(executor, pages, template, basepath, jobs)
+
+    failures = []
+    workers = {}
+    generated = 0
+    untouched = 0
+    for result in results:
+        failures.extend(result["errors"])
+        generated += result["count"]
+        untouched += result["untouched"]
+        for name, drained in result["drained"].items():
+            collectors[name].absorb(drained)
+        pid = result["pid"]
+        # Rates only mean something for pool workers that ran pages.
+        if pooled and pid is not None and result["count"]:
+            total_count, total_elapsed = workers.get(pid, (0, 0.0))
+            workers[pid] = (
+                total_count + result["count"],
+                total_elapsed + result["elapsed"],
+            )
+    for pid in sorted(workers):
+        count, elapsed = workers[pid]
+        rate = count / elapsed if elapsed > 0 else 0.0
+        print(f"worker {pid}: {count} pages in {elapsed:.2f}s ({rate:.1f} pages/sec)")
+    if generated:
+        print(
+            f"{untouched} of {generated} generated pages were already up to date "
+            "and left untouched"
+        )
+    for from_path, error in sorted(failures):
+        print(f"error: {from_path}: {error}")
+    return sorted(failures)
+
+
+def chunk_pages(pages, jobs):
+    # A few chunks per worker balances uneven pages without paying a
+    # round trip to the pool for every single file.
+    chunk_size = max(1, min(256, -(-len(pages) // (jobs * 4))))
+    return [pages[i : i + chunk_size] for i in range(0, len(pages), chunk_size)]
+
+
+def page_collectors(
+    block_cache=None, content_cache=None, profile=None, trace=None, build_cache=None
+):
+    # Caches, the profile and the trace gather state while pages are
+    # generated. Pool workers each get their own copy and hand what they
+    # gathered back with every chunk (drain), for the parent's copy to take
+    # in (absorb).
+    return {
+        "block_cache": block_cache,
+        "content_cache": content_cache,
+        "profile": profile,
+        "trace": trace,
+        "build_cache": build_cache,
+    }
+
+
+def start_worker_pool(jobs, collectors):
+    # A pool can outlive one build (see --watch); its workers keep their
+    # collectors, and so their warm caches, from one build to the next.
+    return ProcessPoolExecutor(
+        max_workers=jobs, initializer=init_worker, initargs=(collectors,)
+    )
+
+
+def run_page_chunks(executor, pages, template, basepath, jobs):
+    results = []
+    futures = {}
+    for chunk in chunk_pages(pages, jobs):
+        future = executor.submit(generate_worker_chunk, chunk, template, basepath)
+        futures[future] = chunk
+    # Taken in submission order rather than as completed, so the parent's
+    # collectors absorb the same sequence on every run.
+    for future in futures:
+        try:
+            results.append(future.result())
+        except Exception as e:
+            # The worker died outright (e.g. BrokenProcessPool), so blame
+            # every page of its chunk rather than abort.
+            chunk = futures[future]
+            errors = [(from_path, f"worker failed: {e}") for from_path, _, _ in chunk]
+            results.append(chunk_result(None, 0, 0.0, errors))
+    return results
+
+
+def chunk_result(pid, count, elapsed, errors, untouched=0):
+    return {
+        "pid": pid,
+        "count": count,
+        "elapsed": elapsed,
+        "errors": errors,
+        "untouched": untouched,
+        "drained": {},
+    }
+
+
+# The collectors a pool worker keeps between the chunks it is handed.
+worker_collectors = {}
+
+
+def init_worker(collectors):
+    worker_collectors.update(collectors)
+    for collector in collectors.values():
+        if collector is not None:
+            collector.drain()
+
 
+def generate_worker_chunk(pages, template, basepath):
+    result = generate_page_chunk(pages, template, basepath, **worker_collectors)
+    for name, collector in worker_collectors.items():
+        if collector is not None:
+            result["drained"][name] = collector.drain()
+    return result
 
-def generate_page(from_path, template_path, dest_path, basepath):
-    print(f" * {from_path} {template_path} -> {dest_path}")
-    from_file = open(from_path, "r")
-    markdown_content = from_file.read()
-    from_file.close()
 
-    template_file = open(template_path, "r")
-    template = template_file.read()
-    template_file.close()
+def generate_page_chunk(
+    pages,
+    template,
+    basepath,
+    block_cache=None,
+    content_cache=None,
+    profile=None,
+    trace=None,
+    build_cache=None,
+):
+    start = time.perf_counter()
+    count = 0
+    untouched = 0
+    errors = []
+    for from_path, dest_path, source_hash in pages:
+        try:
+            with span(trace, "generate_page", "page", page=str(from_path)):
+                written = generate_page(
+                    from_path,
+                    template,
+                    dest_path,
+                    basepath,
+                    block_cache,
+                    content_cache,
+                    source_hash,
+                    profile,
+                    build_cache,
+                )
+            count += 1
+            if not written:
+                untouched += 1
+        except Exception as e:
+            errors.append((from_path, f"{type(e).__name__}: {e}"))
+    elapsed = time.perf_counter() - start
+    return chunk_result(os.getpid(), count, elapsed, errors, untouched)
 
-    node = markdown_to_html_node(markdown_content)
-    html = node.to_html()
 
-    title = extract_title(markdown_content)
-    template = template.replace("{{ Title }}", title)
-    template = template.replace("{{ Content }}", html)
-    template = template.replace('href="/', 'href="' + basepath)
-    template = template.replace('src="/', 'src="' + basepath)
+def page_dest_path(from_path, dir_path_content, dest_dir_path):
+    rel_path = os.path.relpath(from_path, dir_path_content)
+    return Path(os.path.join(dest_dir_path, rel_path)).with_suffix(".html")
 
+
+def collect_pages(dir_path_content, dest_dir_path):
+    pages = []
+    for entry, key in walk_files(dir_path_content):
+        dest_path = os.path.join(dest_dir_path, *key.split("/"))
+        pages.append((entry.path, Path(dest_path).with_suffix(".html")))
+    return pages
+
+
+def remove_page(dest_dir_path, dest_key):
+    remove_output(dest_dir_path, dest_key)
+
+
+def generate_page(
+    from_path,
+    template,
+    dest_path,
+    basepath,
+    block_cache=None,
+    content_cache=None,
+    source_hash=None,
+    profile=None,
+    build_cache=None,
+):
+    if not isinstance(template, Template):
+        template = load_template(template)
+    print(f" * {from_path} {template.path} -> {dest_path}")
+    if content_cache is not None or build_cache is not None:
+        if source_hash is None:
+            source_hash = hash_file(from_path)
+    if profile is not None:
+        return profile_page(
+            from_path,
+            template,
+            dest_path,
+            basepath,
+            block_cache,
+            content_cache,
+            source_hash,
+            profile,
+            build_cache,
+        )
+
+    if build_cache is not None:
+        build_key = build_cache.key(source_hash, template.hash, basepath)
+        page = build_cache.stream(build_key)
+        if page is not None:
+            return write_output(dest_path, page)
+
+    # Caches are filled from the same fragments on their way to the output,
+    # so no page or its content is ever held whole.
+    content = None
+    if content_cache is not None:
+        content = content_cache.stream(source_hash)
+    if content is not None:
+        title, fragments = content
+    else:
+        title, node = parse_page(from_path, block_cache)
+        fragments = node.iter_html()
+        if content_cache is not None:
+            fragments = content_cache.tee(source_hash, title, fragments)
+
+    page = template.iter_render(title, fragments, basepath)
+    if build_cache is not None:
+        page = build_cache.tee(build_key, page)
+    return write_output(dest_path, page)
+
+
+def write_output(dest_path, fragments):
+    # The page is streamed into a file beside the destination and hashed on
+    # the way, so it is never held in memory whole. Returns False, dropping
+    # the new file and leaving the old one and its mtime alone, when the
+    # bytes are the same; otherwise the new file is renamed over the old.
+    # Never written in place: the old file may be a hardlink into the
+    # published output.
     dest_dir_path = os.path.dirname(dest_path)
     if dest_dir_path != "":
         os.makedirs(dest_dir_path, exist_ok=True)
-    to_file = open(dest_path, "w")
-    to_file.write(template)
+    tmp_path = f"{dest_path}.sitegen-tmp"
+    digest = hashlib.sha256()
+    try:
+        # Line endings are always written as \n, whatever the platform.
+        with open(tmp_path, "w", newline="\n") as to_file:
+            for fragment in fragments:
+                to_file.write(fragment)
+                digest.update(fragment.encode(to_file.encoding))
+        if output_matches(dest_path, os.path.getsize(tmp_path), digest.hexdigest()):
+            os.remove(tmp_path)
+            return False
+        os.replace(tmp_path, dest_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return True
+
+
+def output_matches(dest_path, size, digest):
+    # The old file is only read (in chunks) when its size already matches.
+    try:
+        return os.path.getsize(dest_path) == size and hash_file(dest_path) == digest
+    except (FileNotFoundError, IsADirectoryError):
+        return False
+
+
+def profile_page(
+    from_path,
+    template,
+    dest_path,
+    basepath,
+    block_cache,
+    content_cache,
+    source_hash,
+    profile,
+    build_cache=None,
+):
+    # Same steps as generate_page, but each stage runs to completion on its
+    # own so it can be timed; generate_page streams them into one another.
+    timings = {}
+    start = time.perf_counter()
+    if build_cache is not None:
+        build_key = build_cache.key(source_hash, template.hash, basepath)
+        page = build_cache.get(build_key)
+        if page is not None:
+            # Straight to writing; the lookup counts as reading the page.
+            lap = time.perf_counter()
+            timings["read"] = lap - start
+            written = write_output(dest_path, [page])
+            timings["write"] = time.perf_counter() - lap
+            output_bytes = os.path.getsize(dest_path)
+            profile.record(str(from_path), timings, output_bytes, True)
+            return written
+    with open(from_path, "r") as from_file:
+        markdown_content = from_file.read()
+    _, markdown_body = split_front_matter(markdown_content)
+    lap = time.perf_counter()
+    timings["read"] = lap - start
+
+    content = None
+    if content_cache is not None:
+        if source_hash is None:
+            source_hash = hash_file(from_path)
+        content = content_cache.get(source_hash)
+    if content is not None:
+        title, html = content
+        timings["parse"] = time.perf_counter() - lap
+        timings["render"] = 0.0
+    else:
+        node = markdown_to_html_node(markdown_body, block_cache)
+        title = extract_title(markdown_content)
+        start, lap = lap, time.perf_counter()
+        timings["parse"] = lap - start
+        html = node.to_html()
+        if content_cache is not None:
+            content_cache.put(source_hash, title, html)
+        timings["render"] = time.perf_counter() - lap
+    lap = time.perf_counter()
+
+    page = template.render(title, html, basepath)
+    if build_cache is not None:
+        build_cache.put(build_key, page)
+    start, lap = lap, time.perf_counter()
+    timings["template"] = lap - start
+
+    written = write_output(dest_path, [page])
+    timings["write"] = time.perf_counter() - lap
+    output_bytes = os.path.getsize(dest_path)
+    profile.record(str(from_path), timings, output_bytes, content is not None)
+    return written
+
+
+def parse_page(from_path, block_cache=None):
+    # Front matter is not part of the page; a title given there wins over
+    # the first heading.
+    with open(from_path, "r") as from_file:
+        meta, lines = read_front_matter(from_file)
+        markdown_lines = TitleScanner(lines)
+        node = markdown_to_html_node(markdown_lines, block_cache)
+    if "title" in meta:
+        return str(meta["title"]), node
+    if markdown_lines.title is None:
+        raise ValueError("no title found")
+    return markdown_lines.title, node
+
+
+class TitleScanner:
+    # Passes lines through to the block parser while picking out the same
+    # title extract_title would, so a page is read in a single pass.
+    def __init__(self, lines):
+        self.lines = lines
+        self.title = None
+
+    def __iter__(self):
+        for line in self.lines:
+            if self.title is None and line.startswith("# "):
+                self.title = line[2:].rstrip("\n")
+            yield line
 
 
 def extract_title(md):
-    lines = md.split("\n")
-    for line in lines:
-        if line.startswith("# "):
-            return line[2:]
-    raise ValueError("no title found")
+    meta = read_header(md.split("\n"))
+    if "title" not in meta:
+        raise ValueError("no title found")
+    return str(meta["title"])
@@ -3,13 +3,53 @@ import re
 from textnode import TextNode, TextType
 
 
+INLINE_TOKEN_PATTERN = re.compile(
+    r"(?P<image>!\[(?P<alt>[^\[\]]*)\]\((?P<src>[^\(\)]*)\))"
+    r"|(?P<link>\[(?P<anchor>[^\[\]]*)\]\((?P<href>[^\(\)]*)\))"
+    r"|(?P<delimiter>\*\*|_|`)"
+)
+DELIMITER_TYPES = {"**": TextType.BOLD, "_": TextType.ITALIC, "`": TextType.CODE}
+
+
 def text_to_textnodes(text):
-    nodes = [TextNode(text, TextType.TEXT)]
-    nodes = split_nodes_delimiter(nodes, "**", TextType.BOLD)
-    nodes = split_nodes_delimiter(nodes, "_", TextType.ITALIC)
-    nodes = split_nodes_delimiter(nodes, "`", TextType.CODE)
-    nodes = split_nodes_image(nodes)
-    nodes = split_nodes_link(nodes)
+    if "*" not in text and "_" not in text and "`" not in text and "[" not in text:
+        if text == "":
+            return []
+        return [TextNode(text, TextType.TEXT)]
+
+    # One left-to-right scan. A delimiter takes everything up to its closing
+    # twin verbatim, so nothing inside a code span is split again, and
+    # brackets that don't form an image or link simply stay plain text.
+    nodes = []
+    text_start = 0
+    match = INLINE_TOKEN_PATTERN.search(text)
+    while match is not None:
+        kind = match.lastgroup
+        if kind == "delimiter":
+            delimiter = match.group(kind)
+            close = text.find(delimiter, match.end())
+            if close == -1:
+                raise ValueError("invalid markdown, formatted section not closed")
+            node = None
+            if close > match.end():
+                node = TextNode(
+                    text[match.end() : close], DELIMITER_TYPES[delimiter]
+                )
+            end = close + len(delimiter)
+        elif kind == "image":
+            node = TextNode(match.group("alt"), TextType.IMAGE, match.group("src"))
+            end = match.end()
+        else:
+            node = TextNode(match.group("anchor"), TextType.LINK, match.group("href"))
+            end = match.end()
+        if match.start() > text_start:
+            nodes.append(TextNode(text[text_start : match.start()], TextType.TEXT))
+        if node is not None:
+            nodes.append(node)
+        text_start = end
+        match = INLINE_TOKEN_PATTERN.search(text, end)
+    if text_start < len(text):
+        nodes.append(TextNode(text[text_start:], TextType.TEXT))
     return nodes
 
 
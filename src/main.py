@@ -1,32 +1,622 @@
-import os
-import shutil
-import sys
-
-from copystatic import copy_files_recursive
-from gencontent import generate_pages_recursive
-
-
-dir_path_static = "./static"
-dir_path_public = "./docs"
-dir_path_content = "./content"
-template_path = "./template.html"
-default_basepath = "/"
-
-
-def main():
-    basepath = default_basepath
-    if len(sys.argv) > 1:
-        basepath = sys.argv[1]
-
-    print("Deleting public directory...")
-    if os.path.exists(dir_path_public):
-        shutil.rmtree(dir_path_public)
-
-    print("Copying static files to public directory...")
-    copy_files_recursive(dir_path_static, dir_path_public)
-
-    print("Generating content...")
-    generate_pages_recursive(dir_path_content, template_path, dir_path_public, basepath)
-
-
-main()
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+
+from blockcache import BlockCache
+from buildcache import BuildCache
+from contentcache import ContentCache
+from copystatic import COPY_MODES, remove_unowned_outputs, sync_static
+from deploy import deploy_report, diff_outputs, index_outputs, save_deploy_manifest
+from devserver import DevSite, RenderCache, serve
+from gencontent import (
+    PageGenerationError,
+    generate_pages_recursive,
+    page_collectors,
+    start_worker_pool,
+)
+from manifest import BuildManifest
+from merge import ShardMergeError, merge_shards
+from metadata import MetadataIndex
+from profiling import BuildProfile
+from staging import (
+    discard_staging,
+    publish_output,
+    rollback_output,
+    stage_output,
+    swap_paths,
+)
+from shard import parse_shard
+from tracing import BuildTrace, span
+from watch import snapshot, wait_for_changes
+
+
+dir_path_static = "./static"
+dir_path_public = "./docs"
+dir_path_content = "./content"
+dir_path_cache = "./.sitegen"
+template_path = "./template.html"
+default_basepath = "/"
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="Build the static site.")
+    parser.add_argument("basepath", nargs="?", default=default_basepath)
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=1,
+        help="number of worker processes for page generation (0 = one per CPU)",
+    )
+    parser.add_argument(
+        "--block-cache",
+        action="store_true",
+        help="reuse rendered HTML for identical blocks, persisted between builds",
+    )
+    parser.add_argument(
+        "--block-cache-size",
+        type=int,
+        default=64,
+        help="block cache size limit in MiB of rendered HTML (default: 64)",
+    )
+    parser.add_argument(
+        "--no-content-cache",
+        action="store_true",
+        help="always re-parse stale pages instead of reusing their cached content",
+    )
+    parser.add_argument(
+        "--build-cache",
+        metavar="DIR",
+        help="reuse rendered pages from a content-addressed cache in DIR, "
+        "e.g. one restored between CI runs",
+    )
+    parser.add_argument(
+        "--build-cache-size",
+        type=int,
+        default=512,
+        help="build cache size limit in MiB; least recently used pages are "
+        "evicted after each build (default: 512)",
+    )
+    parser.add_argument(
+        "--checksum",
+        action="store_true",
+        help="compare static files by content hash rather than size and mtime",
+    )
+    parser.add_argument(
+        "--static-mode",
+        choices=COPY_MODES,
+        default="copy",
+        help="how static files reach the output: copy (in-kernel where "
+        "possible), hardlink or reflink; links fall back to copying across "
+        "filesystems (default: copy)",
+    )
+    parser.add_argument(
+        "--copy-threads",
+        type=int,
+        default=None,
+        help="threads used to copy static files (default: Python's thread pool default)",
+    )
+    parser.add_argument(
+        "--in-place",
+        action="store_true",
+        help="build straight into the public directory instead of staging "
+        "the build and swapping it in when it succeeds",
+    )
+    parser.add_argument(
+        "--rollback",
+        action="store_true",
+        help="swap the previous build back in (run again to undo) and exit",
+    )
+    parser.add_argument(
+        "--shard",
+        metavar="I/N",
+        help="build only the I-th of N parts of content and static, balanced "
+        "by file size, e.g. on one of N CI nodes; see `main.py merge`",
+    )
+    parser.add_argument(
+        "--verify",
+        action="store_true",
+        help="after building, build again from scratch without any caches "
+        "and fail if any output's hash differs",
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="after building, keep rebuilding whatever changes in content, "
+        "static and the template until interrupted",
+    )
+    parser.add_argument(
+        "--poll-interval",
+        type=float,
+        default=0.1,
+        help="seconds between checks for changes with --watch (default: 0.1)",
+    )
+    parser.add_argument(
+        "--debounce",
+        type=float,
+        default=0.05,
+        help="seconds without further changes before --watch rebuilds "
+        "(default: 0.05)",
+    )
+    parser.add_argument(
+        "--serve",
+        action="store_true",
+        help="instead of building, serve the site, rendering pages from "
+        "content on demand",
+    )
+    parser.add_argument(
+        "--no-live-reload",
+        action="store_true",
+        help="don't make pages served by --serve reload themselves on changes",
+    )
+    parser.add_argument(
+        "--host",
+        default="127.0.0.1",
+        help="address for --serve to listen on (default: 127.0.0.1)",
+    )
+    parser.add_argument(
+        "--port",
+        type=int,
+        default=8888,
+        help="port for --serve to listen on (default: 8888)",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="time each stage of every page and report the slowest pages",
+    )
+    parser.add_argument(
+        "--profile-top",
+        type=int,
+        default=10,
+        help="number of slowest pages to print with --profile (default: 10)",
+    )
+    parser.add_argument(
+        "--trace",
+        nargs="?",
+        const=os.path.join(dir_path_cache, "trace.json"),
+        metavar="PATH",
+        help="write a Chrome/Perfetto trace of the build "
+        "(default: .sitegen/trace.json)",
+    )
+    args = parser.parse_args(argv)
+    if args.shard is not None:
+        if args.watch:
+            parser.error("--shard can't be combined with --watch")
+        try:
+            args.shard = parse_shard(args.shard)
+        except ValueError as e:
+            parser.error(str(e))
+    return args
+
+
+def parse_cache_args(argv):
+    parser = argparse.ArgumentParser(
+        prog="main.py cache", description="Manage the build cache."
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    gc_parser = subparsers.add_parser(
+        "gc", help="evict least recently used pages until the cache fits"
+    )
+    gc_parser.add_argument("dir", help="build cache directory")
+    gc_parser.add_argument(
+        "--max-size",
+        type=int,
+        default=512,
+        help="size to shrink the cache to, in MiB (default: 512)",
+    )
+    return parser.parse_args(argv)
+
+
+def cache_command(argv):
+    args = parse_cache_args(argv)
+    build_cache = BuildCache(args.dir)
+    before = build_cache.entries()
+    removed, freed = build_cache.gc(args.max_size * 1024 * 1024)
+    remaining = sum(size for _, size, _ in before) - freed
+    print(
+        f"Removed {removed} of {len(before)} cached pages ({freed // 1024}K), "
+        f"{remaining // 1024}K left"
+    )
+
+
+def parse_merge_args(argv):
+    parser = argparse.ArgumentParser(
+        prog="main.py merge",
+        description=f"Combine --shard builds into {dir_path_public}. Each "
+        f"shard directory holds one node's {os.path.basename(dir_path_public)}/ "
+        f"and {os.path.basename(dir_path_cache)}/ directories.",
+    )
+    parser.add_argument("shard_dirs", nargs="+", metavar="SHARD_DIR")
+    return parser.parse_args(argv)
+
+
+def merge_command(argv):
+    args = parse_merge_args(argv)
+    manifest_path = os.path.join(dir_path_cache, "manifest.json")
+    previous_manifest_path = os.path.join(dir_path_cache, "manifest.previous.json")
+    deploy_manifest_path = os.path.join(dir_path_cache, "deploy.json")
+    manifest = BuildManifest(manifest_path)
+    previous_outputs = manifest.outputs
+    try:
+        staging_dir_path, merged = merge_shards(
+            args.shard_dirs,
+            dir_path_public,
+            manifest,
+            os.path.basename(dir_path_public),
+            os.path.basename(dir_path_cache),
+        )
+    except ShardMergeError as e:
+        print(f"Merge failed: {e}")
+        for key, first, second in e.collisions:
+            print(f" * {key}: {first} and {second}")
+        sys.exit(1)
+    except ValueError as e:
+        print(f"Merge failed: {e}")
+        sys.exit(1)
+    manifest.outputs = index_outputs(staging_dir_path, manifest.outputs)
+    changes = diff_outputs(previous_outputs, manifest.outputs)
+    save_deploy_manifest(deploy_manifest_path, changes)
+    publish_output(dir_path_public)
+    if os.path.exists(manifest_path):
+        os.replace(manifest_path, previous_manifest_path)
+    manifest.save()
+    print(
+        f"Merged {merged} files from {len(args.shard_dirs)} shards into "
+        f"{dir_path_public}"
+    )
+    print(deploy_report(changes))
+    print(f"Deploy manifest written to {deploy_manifest_path}")
+
+
+def parse_pages_args(argv):
+    parser = argparse.ArgumentParser(
+        prog="main.py pages",
+        description="List pages by date from their front matter and titles, "
+        "without parsing page bodies.",
+    )
+    parser.add_argument("--tag", help="only pages with this tag")
+    parser.add_argument(
+        "--drafts", action="store_true", help="include pages marked draft: true"
+    )
+    return parser.parse_args(argv)
+
+
+def pages_command(argv):
+    args = parse_pages_args(argv)
+    index = MetadataIndex(
+        dir_path_content, os.path.join(dir_path_cache, "metadata.json")
+    )
+    try:
+        results = index.query(args.tag, args.drafts)
+    except ValueError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+    index.save()
+    for key, meta in results:
+        date = str(meta.get("date", "-"))
+        draft = " (draft)" if meta.get("draft") is True else ""
+        print(f"{date:<10}  {key}: {meta.get('title', '')}{draft}")
+    print(f"{len(results)} pages ({index.read} headers read)")
+
+
+def main():
+    if sys.argv[1:2] == ["pages"]:
+        pages_command(sys.argv[2:])
+        return
+    if sys.argv[1:2] == ["cache"]:
+        cache_command(sys.argv[2:])
+        return
+    if sys.argv[1:2] == ["merge"]:
+        merge_command(sys.argv[2:])
+        return
+    args = parse_args(sys.argv[1:])
+    basepath = args.basepath
+    jobs = args.jobs if args.jobs > 0 else os.cpu_count() or 1
+    manifest_path = os.path.join(dir_path_cache, "manifest.json")
+    previous_manifest_path = os.path.join(dir_path_cache, "manifest.previous.json")
+    deploy_manifest_path = os.path.join(dir_path_cache, "deploy.json")
+
+    if args.rollback:
+        try:
+            rollback_output(dir_path_public)
+        except ValueError as e:
+            print(f"Rollback failed: {e}")
+            sys.exit(1)
+        if os.path.exists(manifest_path) and os.path.exists(previous_manifest_path):
+            swap_paths(previous_manifest_path, manifest_path)
+        elif os.path.exists(previous_manifest_path):
+            os.rename(previous_manifest_path, manifest_path)
+        print(f"Rolled {dir_path_public} back to the previous build")
+        return
+
+    if args.serve:
+        site = DevSite(
+            dir_path_content,
+            dir_path_static,
+            template_path,
+            basepath,
+            RenderCache(),
+            not args.no_live_reload,
+        )
+        serve(site, args.host, args.port)
+        return
+
+    trace = BuildTrace() if args.trace is not None else None
+
+    with span(trace, "load_caches", "main"):
+        manifest = BuildManifest(manifest_path)
+        block_cache = None
+        if args.block_cache:
+            block_cache = BlockCache(
+                args.block_cache_size * 1024 * 1024,
+                os.path.join(dir_path_cache, "blocks.json"),
+            )
+        content_cache = None
+        if not args.no_content_cache:
+            content_cache = ContentCache(os.path.join(dir_path_cache, "content"))
+        build_cache = None
+        if args.build_cache is not None:
+            build_cache = BuildCache(
+                args.build_cache, args.build_cache_size * 1024 * 1024
+            )
+    profile = BuildProfile() if args.profile else None
+
+    # Unless building in place, the build goes to a staging directory that
+    # replaces the published output only once every page is written.
+    staged = not args.in_place
+    output_dir = dir_path_public
+    if staged:
+        with span(trace, "stage_output", "main"):
+            output_dir = stage_output(dir_path_public)
+    published = False
+    built = False
+    try:
+        print("Copying static files to public directory...")
+        with span(trace, "copy_static", "main"):
+            manifest.static, static_stats = sync_static(
+                dir_path_static,
+                output_dir,
+                manifest.static,
+                args.checksum,
+                trace,
+                args.static_mode,
+                args.copy_threads,
+                args.shard,
+            )
+        print(static_stats.report())
+
+        if args.shard is not None:
+            print(f"Generating content for shard {args.shard[0]}/{args.shard[1]}...")
+        else:
+            print("Generating content...")
+        with span(trace, "generate_content", "main"):
+            generate_pages_recursive(
+                dir_path_content,
+                template_path,
+                output_dir,
+                basepath,
+                manifest,
+                jobs,
+                block_cache,
+                content_cache,
+                profile,
+                trace,
+                build_cache=build_cache,
+                shard=args.shard,
+            )
+
+        # Syncing and pruning only delete what the manifest recorded; this
+        # catches everything else no page or static file accounts for.
+        with span(trace, "remove_unowned_outputs", "main"):
+            owned = set(manifest.static)
+            owned.update(entry["dest"] for entry in manifest.pages.values())
+            removed = remove_unowned_outputs(output_dir, owned)
+        if removed:
+            print(f"Removed {removed} files no page or static file accounts for")
+
+        with span(trace, "index_outputs", "main"):
+            previous_outputs = manifest.outputs
+            manifest.outputs = index_outputs(output_dir, previous_outputs)
+            changes = diff_outputs(previous_outputs, manifest.outputs)
+            save_deploy_manifest(deploy_manifest_path, changes)
+        print(deploy_report(changes))
+        print(f"Deploy manifest written to {deploy_manifest_path}")
+
+        if staged:
+            with span(trace, "publish", "main"):
+                publish_output(dir_path_public)
+                if os.path.exists(manifest_path):
+                    os.replace(manifest_path, previous_manifest_path)
+            published = True
+        built = True
+    except PageGenerationError as e:
+        print(f"Build failed: {e}")
+        if not args.watch:
+            sys.exit(1)
+    finally:
+        with span(trace, "save_caches", "main"):
+            if published or not staged:
+                manifest.save()
+                if content_cache is not None:
+                    content_cache.prune(manifest_sources(manifest))
+            else:
+                # The published output is untouched, so is its manifest.
+                discard_staging(dir_path_public)
+                print(f"{dir_path_public} was left as it was")
+            if block_cache is not None:
+                block_cache.save()
+            if build_cache is not None:
+                build_cache.gc()
+        print(
+            f"Skipped {manifest.skipped} unchanged pages, rebuilt {manifest.rebuilt}"
+        )
+        if block_cache is not None:
+            print(block_cache.report())
+        if content_cache is not None:
+            print(content_cache.report())
+        if build_cache is not None:
+            print(build_cache.report())
+        if profile is not None:
+            profile_path = os.path.join(dir_path_cache, "profile.json")
+            profile.save(profile_path)
+            print(profile.report(args.profile_top))
+            print(f"Profile written to {profile_path}")
+        if trace is not None:
+            trace.save(args.trace)
+            print(f"Trace written to {args.trace}")
+
+    if args.verify and built:
+        verify(args, basepath, jobs, manifest.outputs)
+
+    if args.watch:
+        watch(args, basepath, jobs, block_cache, content_cache)
+
+
+def verify(args, basepath, jobs, outputs):
+    # The second build starts from nothing: no manifest, no caches and an
+    # empty output directory. Any hash that differs from the real build's
+    # index (outputs) is a stale cache or a build that isn't reproducible.
+    print("Verifying against a clean build...")
+    os.makedirs(dir_path_cache, exist_ok=True)
+    with tempfile.TemporaryDirectory(dir=dir_path_cache) as scratch_dir_path:
+        clean_dir_path = os.path.join(scratch_dir_path, "docs")
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                sync_static(
+                    dir_path_static,
+                    clean_dir_path,
+                    mode=args.static_mode,
+                    threads=args.copy_threads,
+                    shard=args.shard,
+                )
+                generate_pages_recursive(
+                    dir_path_content,
+                    template_path,
+                    clean_dir_path,
+                    basepath,
+                    jobs=jobs,
+                    shard=args.shard,
+                )
+        except PageGenerationError as e:
+            print(f"Verify failed: the clean build failed: {e}")
+            sys.exit(1)
+        changes = diff_outputs(index_outputs(clean_dir_path, {}), outputs)
+    mismatches = [
+        (change, entry["path"])
+        for change in ("added", "modified", "deleted")
+        for entry in changes[change]
+    ]
+    if mismatches:
+        print(f"Verify failed: {len(mismatches)} output(s) differ from a clean build")
+        labels = {
+            "added": "only in this build",
+            "modified": "different",
+            "deleted": "missing from this build",
+        }
+        for change, key in mismatches:
+            print(f" * {key}: {labels[change]}")
+        sys.exit(1)
+    print(f"Verified: all {len(outputs)} outputs match a clean build")
+
+
+def manifest_sources(manifest):
+    # Source hashes of the pages the manifest knows, which is all the content
+    # cache needs to keep.
+    return set(entry["source"] for entry in manifest.pages.values())
+
+
+def watch(args, basepath, jobs, block_cache, content_cache):
+    # Rebuilds go straight into the public directory: every page and asset
+    # is renamed over its old version on its own, and restaging the whole
+    # tree for each save would cost more than the rebuild itself. The
+    # manifest comes from disk, as that is what matches the public directory
+    # even when the first build failed.
+    manifest_path = os.path.join(dir_path_cache, "manifest.json")
+    manifest = BuildManifest(manifest_path)
+    watched = [dir_path_content, dir_path_static, template_path]
+    files = snapshot(watched)
+    executor = None
+    if jobs > 1:
+        # Started once, so rebuilds don't pay for process startup and the
+        # workers' caches stay warm.
+        collectors = page_collectors(block_cache, content_cache)
+        executor = start_worker_pool(jobs, collectors)
+    print(f"Watching {', '.join(watched)} for changes (Ctrl+C to stop)...")
+    try:
+        while True:
+            changed, files = wait_for_changes(
+                watched, files, args.poll_interval, args.debounce
+            )
+            start = time.perf_counter()
+            rebuild(
+                args,
+                changed,
+                manifest,
+                basepath,
+                jobs,
+                block_cache,
+                content_cache,
+                executor,
+            )
+            elapsed = time.perf_counter() - start
+            print(f"Rebuilt {len(changed)} changed file(s) in {elapsed * 1000:.0f} ms")
+    except KeyboardInterrupt:
+        print("Stopped watching")
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+        manifest.save()
+        if content_cache is not None:
+            content_cache.prune(manifest_sources(manifest))
+        if block_cache is not None:
+            block_cache.save()
+
+
+def rebuild(
+    args, changed, manifest, basepath, jobs, block_cache, content_cache, executor
+):
+    content_prefix = os.path.join(dir_path_content, "")
+    static_prefix = os.path.join(dir_path_static, "")
+    content_changes = set(path for path in changed if path.startswith(content_prefix))
+    static_changed = any(path.startswith(static_prefix) for path in changed)
+    # A new template means every page, otherwise only the edited ones.
+    pages = None if template_path in changed else content_changes
+    try:
+        if static_changed:
+            manifest.static, static_stats = sync_static(
+                dir_path_static,
+                dir_path_public,
+                manifest.static,
+                args.checksum,
+                None,
+                args.static_mode,
+                args.copy_threads,
+            )
+            print(static_stats.report())
+        if pages is None or pages:
+            generate_pages_recursive(
+                dir_path_content,
+                template_path,
+                dir_path_public,
+                basepath,
+                manifest,
+                jobs,
+                block_cache,
+                content_cache,
+                changed=pages,
+                executor=executor,
+            )
+    except PageGenerationError as e:
+        print(f"Build failed: {e}")
+    except Exception as e:
+        # Keep watching: the next save will most likely fix it.
+        print(f"Build failed: {type(e).__name__}: {e}")
+
+
+if __name__ == "__main__":
+    main()
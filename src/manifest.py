@@ -0,0 +1,117 @@
+import hashlib
+import json
+import os
+
+from markdown_blocks import PARSER_VERSION
+
+
+MANIFEST_VERSION = 1
+
+
+def hash_bytes(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def hash_file(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 16), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class BuildManifest:
+    def __init__(self, path):
+        self.path = path
+        self.pages = {}
+        self.static = []
+        self.outputs = {}
+        self.skipped = 0
+        self.rebuilt = 0
+        self._seen = set()
+        self.load()
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if data.get("version") != MANIFEST_VERSION:
+            return
+        self.pages = data.get("pages", {})
+        self.static = data.get("static", [])
+        self.outputs = data.get("outputs", {})
+
+    def save(self):
+        dir_path = os.path.dirname(self.path)
+        if dir_path != "":
+            os.makedirs(dir_path, exist_ok=True)
+        data = {
+            "version": MANIFEST_VERSION,
+            "pages": self.pages,
+            "static": self.static,
+            "outputs": self.outputs,
+        }
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(data, f, sort_keys=True, separators=(",", ":"))
+        os.replace(tmp_path, self.path)
+
+    def page_inputs(self, key, from_path, template_hash, basepath_hash):
+        # An unchanged size and mtime means the recorded hash is still good,
+        # so only sources that were touched get read and hashed again.
+        stat = os.stat(from_path)
+        entry = self.pages.get(key)
+        if (
+            entry is not None
+            and entry["size"] == stat.st_size
+            and entry["mtime_ns"] == stat.st_mtime_ns
+        ):
+            source_hash = entry["source"]
+        else:
+            source_hash = hash_file(from_path)
+        return {
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "source": source_hash,
+            "template": template_hash,
+            "basepath": basepath_hash,
+            "parser": PARSER_VERSION,
+        }
+
+    def is_fresh(self, key, dest_key, inputs):
+        self._seen.add(key)
+        entry = self.pages.get(key)
+        if entry is None or entry["dest"] != dest_key:
+            return False
+        # Entries saved before "parser" was recorded count as stale.
+        for name in ("source", "template", "basepath", "parser"):
+            if entry.get(name) != inputs[name]:
+                return False
+        return True
+
+    def skip(self, key, inputs):
+        # Keep the cheaper stat fields current after a touch without an edit.
+        self.pages[key].update(inputs)
+        self.skipped += 1
+
+    def record(self, key, dest_key, inputs):
+        self._seen.add(key)
+        entry = dict(inputs)
+        entry["dest"] = dest_key
+        self.pages[key] = entry
+        self.rebuilt += 1
+
+    def forget(self, key):
+        entry = self.pages.pop(key, None)
+        return None if entry is None else entry["dest"]
+
+    def prune(self):
+        removed = []
+        for key in sorted(self.pages):
+            if key not in self._seen:
+                removed.append(self.pages.pop(key)["dest"])
+        return removed
@@ -1,10 +1,18 @@
+import re
 from enum import Enum
 
-from htmlnode import ParentNode
+from htmlnode import LeafNode, ParentNode
 from inline_markdown import text_to_textnodes
 from textnode import text_node_to_html_node, TextNode, TextType
 
 
+# Bump whenever parsing or rendering changes, to invalidate cached output.
+PARSER_VERSION = 4
+
+# A line that opens a fence: ``` and at most a language name.
+FENCE_RE = re.compile(r"```[^`\s]*")
+
+
 class BlockType(Enum):
     PARAGRAPH = "paragraph"
     HEADING = "heading"
@@ -15,34 +23,97 @@ class BlockType(Enum):
 
 
 def markdown_to_blocks(markdown):
-    blocks = markdown.split("\n\n")
-    filtered_blocks = []
-    for block in blocks:
-        if block == "":
+    return ["\n".join(lines) for _, lines in iter_blocks(markdown)]
+
+
+def iter_blocks(markdown):
+    # Accepts a whole document or any iterable of lines (e.g. an open file)
+    # and yields (block_type, lines) one block at a time. Blank lines end a
+    # block, except inside a ``` fence that opens the block; the block keeps
+    # them only if it ends on the fence's closing ```, and is split on them
+    # after all otherwise.
+    if isinstance(markdown, str):
+        lines = markdown.split("\n")
+    else:
+        lines = (line[:-1] if line.endswith("\n") else line for line in markdown)
+    block = []
+    has_text = False
+    in_fence = False
+    closed = False
+    for line in lines:
+        if in_fence:
+            in_fence = line.rstrip() != "```"
+            closed = not in_fence
+        elif line == "":
+            if block:
+                yield from end_block(block, closed)
+                block = []
+                has_text = False
+                closed = False
             continue
-        block = block.strip()
-        filtered_blocks.append(block)
-    return filtered_blocks
+        elif not has_text and line.strip() != "":
+            has_text = True
+            in_fence = FENCE_RE.fullmatch(line.strip()) is not None
+        elif line.strip() != "":
+            closed = False
+        block.append(line)
+    if block:
+        yield from end_block(block, closed)
+
+
+def end_block(lines, closed):
+    if closed:
+        yield from finish_block(lines)
+        return
+    block = []
+    for line in lines:
+        if line != "":
+            block.append(line)
+        elif block:
+            yield from finish_block(block)
+            block = []
+    if block:
+        yield from finish_block(block)
+
+
+def finish_block(lines):
+    # Same as stripping the joined block: drop blank edge lines, then trim
+    # the first and last remaining line.
+    start = 0
+    end = len(lines)
+    while start < end and lines[start].strip() == "":
+        start += 1
+    while end > start and lines[end - 1].strip() == "":
+        end -= 1
+    if start == end:
+        return
+    lines = lines[start:end]
+    lines[0] = lines[0].lstrip()
+    lines[-1] = lines[-1].rstrip()
+    yield lines_to_block_type(lines), lines
 
 
 def block_to_block_type(block):
-    lines = block.split("\n")
+    return lines_to_block_type(block.split("\n"))
 
-    if block.startswith(("# ", "## ", "### ", "#### ", "##### ", "###### ")):
+
+def lines_to_block_type(lines):
+    first = lines[0]
+    if first.startswith(("# ", "## ", "### ", "#### ", "##### ", "###### ")):
         return BlockType.HEADING
-    if len(lines) > 1 and lines[0].startswith("```") and lines[-1].startswith("```"):
+    if len(lines) > 1 and first.startswith("```") and lines[-1].startswith("```"):
         return BlockType.CODE
-    if block.startswith(">"):
+    if first.startswith(">"):
         for line in lines:
             if not line.startswith(">"):
                 return BlockType.PARAGRAPH
         return BlockType.QUOTE
-    if block.startswith("- "):
+    if first.startswith("- "):
         for line in lines:
             if not line.startswith("- "):
                 return BlockType.PARAGRAPH
         return BlockType.ULIST
-    if block.startswith("1. "):
+    if first.startswith("1. "):
         i = 1
         for line in lines:
             if not line.startswith(f"{i}. "):
@@ -52,29 +123,44 @@ def block_to_block_type(block):
     return BlockType.PARAGRAPH
 
 
-def markdown_to_html_node(markdown):
-    blocks = markdown_to_blocks(markdown)
+def markdown_to_html_node(markdown, block_cache=None):
     children = []
-    for block in blocks:
-        html_node = block_to_html_node(block)
+    for block_type, lines in iter_blocks(markdown):
+        if block_cache is None:
+            html_node = lines_to_html_node(block_type, lines)
+        else:
+            html_node = cached_block_html_node(block_cache, block_type, lines)
         children.append(html_node)
     return ParentNode("div", children, None)
 
 
+def cached_block_html_node(block_cache, block_type, lines):
+    key = block_cache.key("\n".join(lines))
+    html = block_cache.get(key)
+    if html is None:
+        html = lines_to_html_node(block_type, lines).to_html()
+        block_cache.put(key, html)
+    return LeafNode(None, html)
+
+
 def block_to_html_node(block):
-    block_type = block_to_block_type(block)
+    lines = block.split("\n")
+    return lines_to_html_node(lines_to_block_type(lines), lines)
+
+
+def lines_to_html_node(block_type, lines):
     if block_type == BlockType.PARAGRAPH:
-        return paragraph_to_html_node(block)
+        return paragraph_to_html_node(lines)
     if block_type == BlockType.HEADING:
-        return heading_to_html_node(block)
+        return heading_to_html_node(lines)
     if block_type == BlockType.CODE:
-        return code_to_html_node(block)
+        return code_to_html_node(lines)
     if block_type == BlockType.OLIST:
-        return olist_to_html_node(block)
+        return olist_to_html_node(lines)
     if block_type == BlockType.ULIST:
-        return ulist_to_html_node(block)
+        return ulist_to_html_node(lines)
     if block_type == BlockType.QUOTE:
-        return quote_to_html_node(block)
+        return quote_to_html_node(lines)
     raise ValueError("invalid block type")
 
 
@@ -87,14 +173,14 @@ def text_to_children(text):
     return children
 
 
-def paragraph_to_html_node(block):
-    lines = block.split("\n")
+def paragraph_to_html_node(lines):
     paragraph = " ".join(lines)
     children = text_to_children(paragraph)
     return ParentNode("p", children)
 
 
-def heading_to_html_node(block):
+def heading_to_html_node(lines):
+    block = "\n".join(lines)
     level = 0
     for char in block:
         if char == "#":
@@ -108,7 +194,8 @@ def heading_to_html_node(block):
     return ParentNode(f"h{level}", children)
 
 
-def code_to_html_node(block):
+def code_to_html_node(lines):
+    block = "\n".join(lines)
     if not block.startswith("```") or not block.endswith("```"):
         raise ValueError("invalid code block")
     text = block[4:-3]
@@ -118,28 +205,25 @@ def code_to_html_node(block):
     return ParentNode("pre", [code])
 
 
-def olist_to_html_node(block):
-    items = block.split("\n")
+def olist_to_html_node(lines):
     html_items = []
-    for item in items:
+    for item in lines:
         text = item[3:]
         children = text_to_children(text)
         html_items.append(ParentNode("li", children))
     return ParentNode("ol", html_items)
 
 
-def ulist_to_html_node(block):
-    items = block.split("\n")
+def ulist_to_html_node(lines):
     html_items = []
-    for item in items:
+    for item in lines:
         text = item[2:]
         children = text_to_children(text)
         html_items.append(ParentNode("li", children))
     return ParentNode("ul", html_items)
 
 
-def quote_to_html_node(block):
-    lines = block.split("\n")
+def quote_to_html_node(lines):
     new_lines = []
     for line in lines:
         if not line.startswith(">"):
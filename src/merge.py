@@ -0,0 +1,69 @@
+import os
+import shutil
+
+from copystatic import copy_file
+from manifest import BuildManifest
+from staging import staging_paths
+
+
+class ShardMergeError(Exception):
+    def __init__(self, collisions):
+        self.collisions = collisions
+        super().__init__(f"{len(collisions)} path(s) produced by more than one shard")
+
+
+def merge_shards(shard_dirs, dest_dir_path, manifest, output_name, cache_name):
+    # Every shard directory holds one node's output_name/ tree and its
+    # cache_name/manifest.json. Only the files a shard's manifest owns (its
+    # pages' dests and its static keys) are taken, whatever else its output
+    # holds. All collisions are found before anything is written; then the
+    # union is staged next to dest_dir_path and the shard manifests replace
+    # what manifest held.
+    sources = {}
+    owners = {}
+    pages = {}
+    static = []
+    outputs = {}
+    collisions = []
+    for shard_dir in shard_dirs:
+        output_dir = os.path.join(shard_dir, output_name)
+        shard_manifest_path = os.path.join(shard_dir, cache_name, "manifest.json")
+        for path in (output_dir, shard_manifest_path):
+            if not os.path.exists(path):
+                raise ValueError(f"not a shard build: {path} is missing")
+        shard_manifest = BuildManifest(shard_manifest_path)
+        for key, entry in shard_manifest.pages.items():
+            if key in owners:
+                collisions.append((key, owners[key], shard_manifest_path))
+            else:
+                owners[key] = shard_manifest_path
+                pages[key] = entry
+        static.extend(shard_manifest.static)
+        owned = [entry["dest"] for entry in shard_manifest.pages.values()]
+        owned.extend(shard_manifest.static)
+        for key in owned:
+            from_path = os.path.join(output_dir, *key.split("/"))
+            if not os.path.isfile(from_path):
+                raise ValueError(f"{shard_manifest_path} lists missing {key}")
+            if key in sources:
+                collisions.append((key, sources[key], from_path))
+                continue
+            sources[key] = from_path
+            if key in shard_manifest.outputs:
+                outputs[key] = shard_manifest.outputs[key]
+    if collisions:
+        raise ShardMergeError(sorted(collisions))
+
+    staging_dir_path, _ = staging_paths(dest_dir_path)
+    if os.path.exists(staging_dir_path):
+        shutil.rmtree(staging_dir_path)
+    os.mkdir(staging_dir_path)
+    for key in sorted(sources):
+        dest_path = os.path.join(staging_dir_path, key)
+        os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+        # A link where the shards were unpacked on the same filesystem.
+        copy_file(sources[key], dest_path, "hardlink")
+    manifest.pages = pages
+    manifest.static = sorted(static)
+    manifest.outputs = outputs
+    return staging_dir_path, len(sources)
@@ -0,0 +1,93 @@
+import json
+import os
+
+from frontmatter import read_header
+from walk import walk_files
+
+
+METADATA_VERSION = 1
+
+
+class MetadataIndex:
+    # Front matter and title of every page under content/, keyed by its
+    # posix path there. Only the top of each file is read (see read_header),
+    # and only when its size or mtime changed since the index was saved, so
+    # listings can be built for thousands of pages without parsing a body.
+    # Nothing is read until the first query.
+    def __init__(self, dir_path_content, path=None):
+        self.dir_path_content = dir_path_content
+        self.path = path
+        self.pages = {}
+        self.fresh = False
+        self.read = 0
+        if path is not None:
+            self.load()
+
+    def refresh(self):
+        pages = {}
+        for entry, key in walk_files(self.dir_path_content):
+            stat = entry.stat()
+            old = self.pages.get(key)
+            if (
+                old is not None
+                and old["size"] == stat.st_size
+                and old["mtime_ns"] == stat.st_mtime_ns
+            ):
+                pages[key] = old
+                continue
+            try:
+                with open(entry.path, "r") as f:
+                    meta = read_header(f)
+            except ValueError as e:
+                raise ValueError(f"{entry.path}: {e}")
+            pages[key] = {
+                "size": stat.st_size,
+                "mtime_ns": stat.st_mtime_ns,
+                "meta": meta,
+            }
+            self.read += 1
+        self.pages = pages
+        self.fresh = True
+
+    def query(self, tag=None, drafts=False):
+        # (key, meta) for every matching page, newest date first; undated
+        # pages come last. Ties go by path.
+        if not self.fresh:
+            self.refresh()
+        results = []
+        for key in sorted(self.pages):
+            meta = self.pages[key]["meta"]
+            if meta.get("draft") is True and not drafts:
+                continue
+            if tag is not None and tag not in page_tags(meta):
+                continue
+            results.append((key, meta))
+        results.sort(key=lambda result: str(result[1].get("date", "")), reverse=True)
+        return results
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if data.get("version") != METADATA_VERSION:
+            return
+        self.pages = data.get("pages", {})
+
+    def save(self):
+        dir_path = os.path.dirname(self.path)
+        if dir_path != "":
+            os.makedirs(dir_path, exist_ok=True)
+        data = {"version": METADATA_VERSION, "pages": self.pages}
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(data, f, sort_keys=True, separators=(",", ":"))
+        os.replace(tmp_path, self.path)
+
+
+def page_tags(meta):
+    tags = meta.get("tags", [])
+    return tags if isinstance(tags, list) else [tags]
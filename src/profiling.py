@@ -0,0 +1,65 @@
+import json
+import os
+
+
+PROFILE_STAGES = ("read", "parse", "render", "template", "write")
+
+
+class BuildProfile:
+    def __init__(self):
+        self.pages = []
+
+    def record(self, page, timings, output_bytes, cached=False):
+        entry = {stage: timings.get(stage, 0.0) for stage in PROFILE_STAGES}
+        entry["total"] = sum(entry.values())
+        entry["page"] = page
+        entry["bytes"] = output_bytes
+        entry["cached"] = cached
+        self.pages.append(entry)
+
+    def drain(self):
+        pages = self.pages
+        self.pages = []
+        return pages
+
+    def absorb(self, pages):
+        self.pages.extend(pages)
+
+    def totals(self):
+        totals = {stage: 0.0 for stage in PROFILE_STAGES}
+        for entry in self.pages:
+            for stage in PROFILE_STAGES:
+                totals[stage] += entry[stage]
+        totals["total"] = sum(totals.values())
+        totals["bytes"] = sum(entry["bytes"] for entry in self.pages)
+        totals["pages"] = len(self.pages)
+        return totals
+
+    def slowest(self, top):
+        return sorted(self.pages, key=lambda entry: entry["total"], reverse=True)[:top]
+
+    def save(self, path):
+        dir_path = os.path.dirname(path)
+        if dir_path != "":
+            os.makedirs(dir_path, exist_ok=True)
+        data = {"totals": self.totals(), "pages": self.slowest(len(self.pages))}
+        with open(path, "w") as f:
+            json.dump(data, f, indent=1)
+
+    def report(self, top=10):
+        header = "".join(f"{stage:>10}" for stage in PROFILE_STAGES)
+        lines = [f"Slowest {min(top, len(self.pages))} pages (ms):"]
+        lines.append(f"{'total':>10}{header}{'bytes':>10}  page")
+        for entry in self.slowest(top):
+            stages = "".join(f"{entry[stage] * 1000:10.2f}" for stage in PROFILE_STAGES)
+            cached = " (cached)" if entry["cached"] else ""
+            lines.append(
+                f"{entry['total'] * 1000:10.2f}{stages}{entry['bytes']:10d}"
+                f"  {entry['page']}{cached}"
+            )
+        totals = self.totals()
+        lines.append(f"Stage totals over {totals['pages']} pages (s):")
+        lines.append(f"{'total':>10}{header}{'bytes':>10}")
+        stages = "".join(f"{totals[stage]:10.3f}" for stage in PROFILE_STAGES)
+        lines.append(f"{totals['total']:10.3f}{stages}{totals['bytes']:10d}")
+        return "\n".join(lines)
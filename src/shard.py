@@ -0,0 +1,38 @@
+import os
+
+
+def parse_shard(text):
+    index, _, count = text.partition("/")
+    try:
+        index = int(index)
+        count = int(count)
+    except ValueError:
+        raise ValueError(f"shard must look like i/N, e.g. 1/4: {text}")
+    if count < 1 or not 1 <= index <= count:
+        raise ValueError(f"shard {index}/{count} is out of range")
+    return index, count
+
+
+def partition_by_size(sizes, count):
+    # Largest first onto whichever shard has the least so far (ties go to
+    # the lower shard). Sorting on the posix key as well keeps every node
+    # computing the same partition from the same tree.
+    shards = [[] for _ in range(count)]
+    loads = [0] * count
+    for key, size in sorted(sizes.items(), key=lambda item: (-item[1], item[0])):
+        i = loads.index(min(loads))
+        shards[i].append(key)
+        loads[i] += size
+    return shards
+
+
+def select_shard(items, keys, shard):
+    # items[i] is identified by keys[i]; returns the items in shard i of N.
+    if shard is None:
+        return items
+    index, count = shard
+    sizes = {}
+    for item, key in zip(items, keys):
+        sizes[key] = os.path.getsize(item[0])
+    selected = set(partition_by_size(sizes, count)[index - 1])
+    return [item for item, key in zip(items, keys) if key in selected]
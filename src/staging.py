@@ -0,0 +1,106 @@
+import ctypes
+import errno
+import os
+import shutil
+import sys
+
+from copystatic import copy_file
+
+
+AT_FDCWD = -100
+RENAME_EXCHANGE = 2
+
+
+def staging_paths(dest_dir_path):
+    dest_dir_path = os.path.normpath(dest_dir_path)
+    return dest_dir_path + ".staging", dest_dir_path + ".previous"
+
+
+def stage_output(dest_dir_path):
+    # The staging tree starts as hardlinks to the published output, so the
+    # incremental build only has to replace what changed. Nothing writes into
+    # these files in place: outputs are always renamed over.
+    staging_dir_path, _ = staging_paths(dest_dir_path)
+    if os.path.exists(staging_dir_path):
+        # Left behind by a build that was killed before it could clean up.
+        shutil.rmtree(staging_dir_path)
+    os.mkdir(staging_dir_path)
+    if os.path.isdir(dest_dir_path):
+        link_tree(dest_dir_path, staging_dir_path)
+    return staging_dir_path
+
+
+def link_tree(source_dir_path, dest_dir_path):
+    for filename in os.listdir(source_dir_path):
+        from_path = os.path.join(source_dir_path, filename)
+        dest_path = os.path.join(dest_dir_path, filename)
+        if os.path.isdir(from_path):
+            os.mkdir(dest_path)
+            link_tree(from_path, dest_path)
+        else:
+            copy_file(from_path, dest_path, "hardlink")
+
+
+def discard_staging(dest_dir_path):
+    staging_dir_path, _ = staging_paths(dest_dir_path)
+    if os.path.exists(staging_dir_path):
+        shutil.rmtree(staging_dir_path)
+
+
+def publish_output(dest_dir_path):
+    # Swap the finished staging tree in and keep what it replaced as the
+    # previous output, ready for a rollback.
+    staging_dir_path, previous_dir_path = staging_paths(dest_dir_path)
+    if os.path.exists(previous_dir_path):
+        shutil.rmtree(previous_dir_path)
+    if not os.path.exists(dest_dir_path):
+        os.rename(staging_dir_path, dest_dir_path)
+        return
+    swap_paths(staging_dir_path, dest_dir_path)
+    os.rename(staging_dir_path, previous_dir_path)
+
+
+def rollback_output(dest_dir_path):
+    _, previous_dir_path = staging_paths(dest_dir_path)
+    if not os.path.isdir(previous_dir_path):
+        raise ValueError(f"no previous output to roll back to: {previous_dir_path}")
+    swap_paths(previous_dir_path, dest_dir_path)
+
+
+def swap_paths(path, other_path):
+    if exchange_paths(path, other_path):
+        return
+    # Without an atomic exchange, other_path is briefly missing.
+    tmp_path = os.path.normpath(other_path) + ".swap"
+    os.rename(other_path, tmp_path)
+    os.rename(path, other_path)
+    os.rename(tmp_path, path)
+
+
+def exchange_paths(path, other_path):
+    # renameat2(RENAME_EXCHANGE) swaps two paths in one step on Linux 3.15+,
+    # so the published directory never disappears, not even briefly.
+    if not sys.platform.startswith("linux"):
+        return False
+    try:
+        renameat2 = ctypes.CDLL(None, use_errno=True).renameat2
+    except (OSError, AttributeError):
+        # glibc before 2.28 and some other libcs have no wrapper.
+        return False
+    renameat2.argtypes = [
+        ctypes.c_int,
+        ctypes.c_char_p,
+        ctypes.c_int,
+        ctypes.c_char_p,
+        ctypes.c_uint,
+    ]
+    result = renameat2(
+        AT_FDCWD, os.fsencode(path), AT_FDCWD, os.fsencode(other_path), RENAME_EXCHANGE
+    )
+    if result == 0:
+        return True
+    error = ctypes.get_errno()
+    if error in (errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP):
+        # An old kernel, or a filesystem that can't exchange.
+        return False
+    raise OSError(error, os.strerror(error), path, None, other_path)
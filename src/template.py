@@ -0,0 +1,87 @@
+import hashlib
+import re
+
+
+PLACEHOLDER_PATTERN = re.compile(r"\{\{ (Title|Content) \}\}")
+ROOT_URL_PATTERN = re.compile(r'(href|src)="/')
+# Longest text that could be the start of a root URL without matching yet.
+ROOT_URL_PREFIX_LENGTH = len('href="/') - 1
+
+
+def rewrite_root_urls(html, basepath):
+    if basepath == "/":
+        return html
+    return ROOT_URL_PATTERN.sub('\\1="' + basepath.replace("\\", "\\\\"), html)
+
+
+def iter_rewrite_root_urls(fragments, basepath):
+    if basepath == "/":
+        yield from fragments
+        return
+    replacement = '="' + basepath
+    carry = ""
+    for fragment in fragments:
+        # A URL can straddle two fragments, so the tail that might begin one
+        # is carried over instead of being emitted.
+        text = carry + fragment
+        pieces = []
+        end = 0
+        for match in ROOT_URL_PATTERN.finditer(text):
+            pieces.append(text[end : match.start()])
+            pieces.append(match.group(1) + replacement)
+            end = match.end()
+        cut = max(end, len(text) - ROOT_URL_PREFIX_LENGTH)
+        pieces.append(text[end:cut])
+        carry = text[cut:]
+        yield "".join(pieces)
+    if carry != "":
+        yield carry
+
+
+class Template:
+    def __init__(self, text, path=None):
+        self.path = path
+        self.hash = hashlib.sha256(text.encode()).hexdigest()
+        # re.split with a capture group alternates static text (even indexes)
+        # and placeholder names (odd indexes).
+        self.segments = PLACEHOLDER_PATTERN.split(text)
+        self._rewritten = {}
+
+    def static_segments(self, basepath):
+        segments = self._rewritten.get(basepath)
+        if segments is None:
+            segments = [
+                rewrite_root_urls(segment, basepath) if i % 2 == 0 else segment
+                for i, segment in enumerate(self.segments)
+            ]
+            self._rewritten[basepath] = segments
+        return segments
+
+    def render(self, title, content, basepath):
+        values = {
+            "Title": rewrite_root_urls(title, basepath),
+            "Content": rewrite_root_urls(content, basepath),
+        }
+        segments = self.static_segments(basepath)
+        parts = []
+        for i, segment in enumerate(segments):
+            parts.append(segment if i % 2 == 0 else values[segment])
+        return "".join(parts)
+
+    def iter_render(self, title, content_fragments, basepath):
+        if self.segments[1::2].count("Content") > 1:
+            # A fragment iterator can only be consumed once.
+            content_fragments = list(content_fragments)
+        segments = self.static_segments(basepath)
+        for i, segment in enumerate(segments):
+            if i % 2 == 0:
+                yield segment
+            elif segment == "Title":
+                yield rewrite_root_urls(title, basepath)
+            else:
+                yield from iter_rewrite_root_urls(content_fragments, basepath)
+
+
+def load_template(template_path):
+    with open(template_path, "r") as f:
+        return Template(f.read(), template_path)
@@ -0,0 +1,57 @@
+import os
+import tempfile
+import unittest
+
+from blockcache import BlockCache
+from markdown_blocks import markdown_to_html_node
+
+
+class TestBlockCache(unittest.TestCase):
+    def test_get_and_put(self):
+        cache = BlockCache()
+        key = cache.key("**bold**")
+        self.assertIsNone(cache.get(key))
+        cache.put(key, "<p><b>bold</b></p>")
+        self.assertEqual(cache.get(key), "<p><b>bold</b></p>")
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+    def test_evicts_least_recently_used(self):
+        cache = BlockCache(max_size=10)
+        cache.put("a", "aaaa")
+        cache.put("b", "bbbb")
+        cache.get("a")
+        cache.put("c", "cccc")
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("a"), "aaaa")
+        self.assertEqual(cache.evictions, 1)
+        self.assertEqual(cache.size, 8)
+
+    def test_persists_between_builds(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "blocks.json")
+            cache = BlockCache(path=path)
+            cache.put("a", "<p>a</p>")
+            cache.save()
+            self.assertEqual(BlockCache(path=path).get("a"), "<p>a</p>")
+
+    def test_drain_and_absorb(self):
+        worker = BlockCache()
+        worker.get("missing")
+        worker.put("a", "<p>a</p>")
+        parent = BlockCache()
+        parent.absorb(worker.drain())
+        self.assertEqual(parent.get("a"), "<p>a</p>")
+        self.assertEqual((parent.hits, parent.misses), (1, 1))
+        self.assertEqual(worker.added, {})
+
+    def test_cached_render_matches_uncached(self):
+        md = "# Title\n\nshared **text**\n\n- a\n- b\n\nshared **text**"
+        cache = BlockCache()
+        expected = markdown_to_html_node(md).to_html()
+        self.assertEqual(markdown_to_html_node(md, cache).to_html(), expected)
+        self.assertEqual(markdown_to_html_node(md, cache).to_html(), expected)
+        self.assertEqual((cache.hits, cache.misses), (5, 3))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,87 @@
+import os
+import tempfile
+import unittest
+
+from buildcache import BuildCache
+from gencontent import generate_pages_recursive
+from profiling import BuildProfile
+
+
+class TestBuildCache(unittest.TestCase):
+    def test_key_covers_every_input(self):
+        cache = BuildCache("unused")
+        key = cache.key("source", "template", "/")
+        self.assertNotEqual(key, cache.key("other", "template", "/"))
+        self.assertNotEqual(key, cache.key("source", "other", "/"))
+        self.assertNotEqual(key, cache.key("source", "template", "/site/"))
+
+    def test_round_trip_and_stats(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = BuildCache(tmp)
+            self.assertIsNone(cache.get("ab12"))
+            cache.put("ab12", "<p>héllo</p>")
+            self.assertEqual(cache.get("ab12"), "<p>héllo</p>")
+            self.assertEqual(cache.drain(), (1, 1, len("<p>héllo</p>".encode())))
+            self.assertIn("0 hits", cache.report())
+
+    def test_gc_evicts_least_recently_used(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = BuildCache(tmp)
+            for i, key in enumerate(["aa1", "bb2", "cc3"]):
+                cache.put(key, "x" * 10)
+                os.utime(cache.entry_path(key), ns=(i, i))
+            cache.get("aa1")
+            self.assertEqual(cache.gc(20), (1, 10))
+            self.assertIsNone(cache.get("bb2"))
+            self.assertEqual(cache.get("aa1"), "x" * 10)
+            self.assertFalse(os.path.exists(os.path.join(tmp, "bb")))
+
+    def test_cold_build_reuses_cached_pages(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            content = os.path.join(tmp, "content")
+            template = os.path.join(tmp, "template.html")
+            os.makedirs(content)
+            with open(os.path.join(content, "index.md"), "w") as f:
+                f.write("# Home\n\n[link](/about)")
+            with open(template, "w") as f:
+                f.write("<title>{{ Title }}</title>{{ Content }}")
+            pages = []
+            for run in range(2):
+                # A fresh output directory each time, as on a new CI runner.
+                cache = BuildCache(os.path.join(tmp, "cache"))
+                public = os.path.join(tmp, f"docs{run}")
+                generate_pages_recursive(
+                    content, template, public, "/site/", build_cache=cache
+                )
+                with open(os.path.join(public, "index.html")) as f:
+                    pages.append(f.read())
+            self.assertEqual((cache.hits, cache.misses), (1, 0))
+            self.assertEqual(pages[0], pages[1])
+            self.assertIn('href="/site/about"', pages[1])
+
+    def test_profiled_build_uses_the_cache(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            content = os.path.join(tmp, "content")
+            template = os.path.join(tmp, "template.html")
+            os.makedirs(content)
+            with open(os.path.join(content, "index.md"), "w") as f:
+                f.write("# Home")
+            with open(template, "w") as f:
+                f.write("<title>{{ Title }}</title>{{ Content }}")
+            for run in range(2):
+                cache = BuildCache(os.path.join(tmp, "cache"))
+                profile = BuildProfile()
+                generate_pages_recursive(
+                    content,
+                    template,
+                    os.path.join(tmp, f"docs{run}"),
+                    "/",
+                    profile=profile,
+                    build_cache=cache,
+                )
+            self.assertEqual((cache.hits, cache.misses), (1, 0))
+            self.assertEqual([entry["cached"] for entry in profile.pages], [True])
+
+
+if __name__ == "__main__":
+    unittest.main()
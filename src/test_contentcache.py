@@ -0,0 +1,70 @@
+import os
+import tempfile
+import unittest
+
+from contentcache import ContentCache
+from gencontent import generate_pages_recursive
+from manifest import BuildManifest
+
+
+class TestContentCache(unittest.TestCase):
+    def test_round_trip(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = ContentCache(tmp)
+            self.assertIsNone(cache.get("ab12"))
+            cache.put("ab12", "Title", "<div><p>line\nbreak</p></div>")
+            self.assertEqual(
+                cache.get("ab12"), ("Title", "<div><p>line\nbreak</p></div>")
+            )
+            self.assertEqual(cache.drain(), (1, 1))
+
+    def test_prune(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            old = os.path.join(tmp, "v0", "ab")
+            os.makedirs(old)
+            with open(os.path.join(old, "ab12"), "w") as f:
+                f.write("Title\n<p>old parser</p>")
+            cache = ContentCache(tmp)
+            cache.put("ab12", "Title", "<p>kept</p>")
+            cache.put("ab34", "Title", "<p>edited since</p>")
+            cache.put("cd56", "Title", "<p>page gone</p>")
+            cache.prune({"ab12"})
+            self.assertEqual(cache.pruned, 2)
+            self.assertEqual(os.listdir(tmp), [os.path.basename(cache.dir_path)])
+            self.assertEqual(os.listdir(cache.dir_path), ["ab"])
+            self.assertEqual(cache.get("ab12"), ("Title", "<p>kept</p>"))
+
+    def test_template_change_reuses_content(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            content = os.path.join(tmp, "content")
+            public = os.path.join(tmp, "docs")
+            template = os.path.join(tmp, "template.html")
+            os.makedirs(content)
+            with open(os.path.join(content, "index.md"), "w") as f:
+                f.write("# Home\n\n[link](/about)")
+            cache = ContentCache(os.path.join(tmp, "cache"))
+
+            def build(template_text):
+                with open(template, "w") as f:
+                    f.write(template_text)
+                manifest = BuildManifest(os.path.join(tmp, "manifest.json"))
+                generate_pages_recursive(
+                    content, template, public, "/site/", manifest, content_cache=cache
+                )
+                manifest.save()
+                with open(os.path.join(public, "index.html")) as f:
+                    return f.read()
+
+            build("{{ Content }}")
+            self.assertEqual((cache.hits, cache.misses), (0, 1))
+            page = build("<h1>{{ Title }}</h1>{{ Content }}")
+            self.assertEqual((cache.hits, cache.misses), (1, 1))
+            self.assertEqual(
+                page,
+                "<h1>Home</h1><div><h1>Home</h1>"
+                '<p><a href="/site/about">link</a></p></div>',
+            )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,140 @@
+import os
+import tempfile
+import unittest
+
+from copystatic import (
+    COPY_MODES,
+    copy_contents,
+    remove_unowned_outputs,
+    sync_static,
+)
+
+
+class TestSyncStatic(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.static = os.path.join(self.tmp.name, "static")
+        self.public = os.path.join(self.tmp.name, "docs")
+        os.makedirs(os.path.join(self.static, "images"))
+        self.write(os.path.join(self.static, "index.css"), "body {}")
+        self.write(os.path.join(self.static, "images", "a.png"), "png")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, path, text):
+        with open(path, "w") as f:
+            f.write(text)
+
+    def sync(self, previous=(), checksum=False, mode="copy"):
+        synced, stats = sync_static(
+            self.static, self.public, previous, checksum, mode=mode
+        )
+        return synced, (stats.copied, stats.skipped, stats.deleted)
+
+    def test_first_sync_copies_everything(self):
+        synced, counts = self.sync()
+        self.assertEqual(synced, ["images/a.png", "index.css"])
+        self.assertEqual(counts, (2, 0, 0))
+        with open(os.path.join(self.public, "images", "a.png")) as f:
+            self.assertEqual(f.read(), "png")
+
+    def test_unchanged_files_are_skipped(self):
+        synced, _ = self.sync()
+        dest = os.path.join(self.public, "index.css")
+        mtime = os.stat(dest).st_mtime_ns
+        _, counts = self.sync(synced)
+        self.assertEqual(counts, (0, 2, 0))
+        self.assertEqual(os.stat(dest).st_mtime_ns, mtime)
+
+    def test_changed_file_is_copied(self):
+        synced, _ = self.sync()
+        self.write(os.path.join(self.static, "index.css"), "body { margin: 0 }")
+        _, counts = self.sync(synced)
+        self.assertEqual(counts, (1, 1, 0))
+        with open(os.path.join(self.public, "index.css")) as f:
+            self.assertEqual(f.read(), "body { margin: 0 }")
+
+    def test_checksum_ignores_touched_files(self):
+        synced, _ = self.sync()
+        source = os.path.join(self.static, "index.css")
+        os.utime(source, ns=(0, 0))
+        _, counts = self.sync(synced, checksum=True)
+        self.assertEqual(counts, (0, 2, 0))
+        _, counts = self.sync(synced)
+        self.assertEqual(counts, (1, 1, 0))
+
+    def test_removed_source_deletes_output_only(self):
+        synced, _ = self.sync()
+        page = os.path.join(self.public, "index.html")
+        self.write(page, "generated")
+        os.remove(os.path.join(self.static, "images", "a.png"))
+        synced, counts = self.sync(synced)
+        self.assertEqual(synced, ["index.css"])
+        self.assertEqual(counts, (0, 1, 1))
+        self.assertFalse(os.path.exists(os.path.join(self.public, "images")))
+        self.assertTrue(os.path.exists(page))
+
+    def test_unowned_outputs_are_removed(self):
+        synced, _ = self.sync()
+        page = os.path.join(self.public, "index.html")
+        self.write(page, "generated")
+        os.makedirs(os.path.join(self.public, "old", "deep"))
+        self.write(os.path.join(self.public, "old", "deep", "page.html"), "stale")
+        self.write(os.path.join(self.public, "images", "b.png"), "stale")
+        owned = set(synced) | {"index.html"}
+        self.assertEqual(remove_unowned_outputs(self.public, owned), 2)
+        self.assertEqual(
+            sorted(os.listdir(self.public)), ["images", "index.css", "index.html"]
+        )
+        self.assertEqual(os.listdir(os.path.join(self.public, "images")), ["a.png"])
+
+    def test_ignored_files_are_not_copied(self):
+        junk = os.path.join(self.static, "images", "a.png:Zone.Identifier")
+        self.write(junk, "[ZoneTransfer]")
+        self.write(os.path.join(self.static, ".sitegenignore"), "*:Zone.Identifier\n")
+        synced, counts = self.sync()
+        self.assertEqual(synced, ["images/a.png", "index.css"])
+        self.assertEqual(os.listdir(os.path.join(self.public, "images")), ["a.png"])
+        self.assertFalse(os.path.exists(os.path.join(self.public, ".sitegenignore")))
+
+    def test_every_mode_copies_contents(self):
+        for mode in COPY_MODES:
+            with self.subTest(mode=mode):
+                _, counts = self.sync(mode=mode)
+                with open(os.path.join(self.public, "images", "a.png")) as f:
+                    self.assertEqual(f.read(), "png")
+                self.assertFalse(os.path.exists(self.public + "/index.css.sitegen-tmp"))
+                _, counts = self.sync(mode=mode)
+                self.assertEqual(counts, (0, 2, 0))
+
+    def test_copy_replaces_hardlinked_output(self):
+        source = os.path.join(self.static, "index.css")
+        dest = os.path.join(self.public, "index.css")
+        self.sync(mode="hardlink")
+        self.assertEqual(os.stat(source).st_ino, os.stat(dest).st_ino)
+        # An editor saving by rename leaves the output linked to the old file.
+        self.write(source + ".new", "body { margin: 0 }")
+        os.replace(source + ".new", source)
+        old = os.path.join(self.tmp.name, "old.css")
+        os.link(dest, old)
+        self.sync(mode="copy")
+        with open(dest) as f:
+            self.assertEqual(f.read(), "body { margin: 0 }")
+        with open(old) as f:
+            self.assertEqual(f.read(), "body {}")
+
+    def test_copy_contents_large_file(self):
+        data = os.urandom(3 * 1024 * 1024 + 17)
+        source = os.path.join(self.tmp.name, "big.bin")
+        dest = os.path.join(self.tmp.name, "big.copy")
+        with open(source, "wb") as f:
+            f.write(data)
+        with open(source, "rb", buffering=0) as src, open(dest, "wb", buffering=0) as dst:
+            copy_contents(src, dst)
+        with open(dest, "rb") as f:
+            self.assertEqual(f.read(), data)
+
+
+if __name__ == "__main__":
+    unittest.main()
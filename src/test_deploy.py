@@ -0,0 +1,63 @@
+import json
+import os
+import tempfile
+import unittest
+
+from deploy import diff_outputs, index_outputs, save_deploy_manifest
+
+
+class TestDeployManifest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.public = os.path.join(self.tmp.name, "docs")
+        os.makedirs(os.path.join(self.public, "blog"))
+        self.write("index.html", "home")
+        self.write("blog/index.html", "blog")
+        self.write("index.css", "css")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, key, text):
+        with open(os.path.join(self.public, key), "w") as f:
+            f.write(text)
+
+    def test_first_build_adds_everything(self):
+        outputs = index_outputs(self.public, {})
+        changes = diff_outputs({}, outputs)
+        self.assertEqual(
+            [entry["path"] for entry in changes["added"]],
+            ["blog/index.html", "index.css", "index.html"],
+        )
+        self.assertEqual(changes["modified"], [])
+
+    def test_delta_against_previous_build(self):
+        previous = index_outputs(self.public, {})
+        self.write("index.html", "new home")
+        self.write("about.html", "about")
+        os.remove(os.path.join(self.public, "index.css"))
+        # Rewritten with the same bytes: not a modification.
+        self.write("blog/index.html", "blog")
+        current = index_outputs(self.public, previous)
+        changes = diff_outputs(previous, current)
+        self.assertEqual([e["path"] for e in changes["added"]], ["about.html"])
+        self.assertEqual([e["path"] for e in changes["modified"]], ["index.html"])
+        self.assertEqual([e["path"] for e in changes["deleted"]], ["index.css"])
+        self.assertEqual(changes["deleted"][0]["sha256"], previous["index.css"][2])
+
+    def test_unchanged_stat_reuses_hash(self):
+        previous = index_outputs(self.public, {})
+        previous["index.html"][2] = "recorded"
+        self.assertEqual(index_outputs(self.public, previous)["index.html"][2], "recorded")
+
+    def test_save(self):
+        path = os.path.join(self.tmp.name, "deploy.json")
+        save_deploy_manifest(path, diff_outputs({}, index_outputs(self.public, {})))
+        with open(path) as f:
+            data = json.load(f)
+        self.assertEqual(data["version"], 1)
+        self.assertEqual(len(data["added"]), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
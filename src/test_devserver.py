@@ -0,0 +1,144 @@
+import asyncio
+import gzip
+import http.client
+import os
+import socket
+import tempfile
+import threading
+import unittest
+
+from devserver import (
+    EVENTS_PATH,
+    LIVE_RELOAD_SCRIPT,
+    CachedResponse,
+    DevServer,
+    DevSite,
+    RenderCache,
+    accepts_gzip,
+)
+
+
+class TestDevServer(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        root = self.tmp.name
+        self.content = os.path.join(root, "content")
+        self.static = os.path.join(root, "static")
+        self.template = os.path.join(root, "template.html")
+        os.makedirs(os.path.join(self.content, "blog"))
+        os.makedirs(self.static)
+        self.write(os.path.join(self.content, "index.md"), "# Home\n\n[about](/about)")
+        self.write(os.path.join(self.content, "blog", "index.md"), "# Blog")
+        self.write(os.path.join(self.static, "index.css"), "body {}" * 100)
+        self.write(self.template, "<title>{{ Title }}</title>{{ Content }}")
+        self.cache = RenderCache()
+        self.site = DevSite(
+            self.content, self.static, self.template, "/site/", self.cache, True
+        )
+        self.server = DevServer(self.site, poll_interval=0.02, debounce=0.02)
+        self.loop = asyncio.new_event_loop()
+        self.loop.run_until_complete(self.server.start("127.0.0.1", 0))
+        self.thread = threading.Thread(target=self.loop.run_forever)
+        self.thread.start()
+
+    def tearDown(self):
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+        self.server.server.close()
+        for task in asyncio.all_tasks(self.loop):
+            task.cancel()
+            self.loop.run_until_complete(asyncio.wait([task]))
+        self.loop.close()
+        self.tmp.cleanup()
+
+    def write(self, path, text):
+        with open(path, "w") as f:
+            f.write(text)
+
+    def get(self, path, headers={}, method="GET"):
+        conn = http.client.HTTPConnection("127.0.0.1", self.server.port)
+        conn.request(method, path, headers=headers)
+        response = conn.getresponse()
+        body = response.read()
+        conn.close()
+        return response, body
+
+    def test_renders_pages_and_static_files(self):
+        response, body = self.get("/site/")
+        self.assertEqual(response.status, 200)
+        self.assertEqual(
+            body,
+            b'<title>Home</title><div><h1>Home</h1>'
+            b'<p><a href="/site/about">about</a></p></div>'
+            + LIVE_RELOAD_SCRIPT.encode(),
+        )
+        response, body = self.get("/site/index.css")
+        self.assertEqual(response.getheader("Content-Type"), "text/css; charset=utf-8")
+        self.assertEqual(self.get("/site/blog")[0].getheader("Location"), "/site/blog/")
+        self.assertEqual(self.get("/site/blog/index.html")[0].status, 200)
+        self.assertEqual(self.get("/site/missing.html")[0].status, 404)
+        self.assertEqual(self.get("/site/../template.html")[0].status, 404)
+        self.assertEqual(self.get("/elsewhere/")[0].status, 404)
+
+    def test_other_methods_are_not_allowed(self):
+        response, body = self.get("/site/", method="POST")
+        self.assertEqual(response.status, 405)
+        self.assertEqual(body, b"method not allowed\n")
+
+    def test_etag_and_cache_invalidation(self):
+        response, _ = self.get("/site/")
+        etag = response.getheader("ETag")
+        response, body = self.get("/site/", {"If-None-Match": etag})
+        self.assertEqual((response.status, body), (304, b""))
+        self.assertEqual(self.cache.hits, 1)
+        self.write(os.path.join(self.content, "index.md"), "# Home\n\nedited")
+        os.utime(os.path.join(self.content, "index.md"), ns=(1, 1))
+        response, body = self.get("/site/", {"If-None-Match": etag})
+        self.assertEqual(response.status, 200)
+        self.assertIn(b"edited", body)
+
+    def test_gzip(self):
+        response, body = self.get("/site/index.css", {"Accept-Encoding": "gzip"})
+        self.assertEqual(response.getheader("Content-Encoding"), "gzip")
+        self.assertEqual(gzip.decompress(body), b"body {}" * 100)
+        response, body = self.get("/site/index.css")
+        self.assertIsNone(response.getheader("Content-Encoding"))
+        self.assertFalse(accepts_gzip("gzip;q=0, br"))
+        self.assertTrue(accepts_gzip("deflate, GZIP"))
+
+    def events(self, page):
+        sock = socket.create_connection(("127.0.0.1", self.server.port), timeout=5)
+        sock.sendall(f"GET {EVENTS_PATH}?page={page} HTTP/1.1\r\n\r\n".encode())
+        stream = sock.makefile("rb")
+        self.addCleanup(sock.close)
+        self.addCleanup(stream.close)
+        while stream.readline() != b"retry: 1000\n":
+            pass
+        # The server subscribes the client just before sending retry.
+        return stream
+
+    def next_event(self, stream):
+        while True:
+            line = stream.readline()
+            if line not in (b"\n", b": keepalive\n"):
+                return line
+
+    def test_live_reload_only_for_changed_pages(self):
+        home = self.events("/site/")
+        blog = self.events("/site/blog/")
+        # Touched without changing how it renders: no reload.
+        os.utime(os.path.join(self.content, "index.md"), ns=(1, 1))
+        self.write(os.path.join(self.content, "blog", "index.md"), "# Blog\n\nnew")
+        self.assertEqual(self.next_event(blog), b"data: reload\n")
+        self.write(self.template, "<h1>{{ Title }}</h1>{{ Content }}")
+        self.assertEqual(self.next_event(home), b"data: reload\n")
+
+    def test_lru_is_bounded(self):
+        cache = RenderCache(max_size=40)
+        for key in ("a", "b", "c"):
+            cache.put(key, (), CachedResponse(b"x" * 20, "text/plain"))
+        self.assertEqual(list(cache.entries), ["b", "c"])
+        self.assertIsNone(cache.get("b", (1, 2)))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,69 @@
+import unittest
+
+from frontmatter import read_front_matter, read_header, split_front_matter
+
+
+class TestFrontMatter(unittest.TestCase):
+    def test_values(self):
+        meta, rest = read_front_matter(
+            [
+                "---\n",
+                "title: 'Quoted: title'\n",
+                "date: 2024-01-02\n",
+                "# a comment\n",
+                "tags: [a, \"b\", 3]\n",
+                "draft: true\n",
+                "order: -2\n",
+                "aliases:\n",
+                "  - /old/\n",
+                "  - /older/\n",
+                "---\n",
+                "# Heading\n",
+            ]
+        )
+        self.assertEqual(
+            meta,
+            {
+                "title": "Quoted: title",
+                "date": "2024-01-02",
+                "tags": ["a", "b", 3],
+                "draft": True,
+                "order": -2,
+                "aliases": ["/old/", "/older/"],
+            },
+        )
+        self.assertEqual(list(rest), ["# Heading\n"])
+
+    def test_no_front_matter(self):
+        meta, rest = read_front_matter(["# Heading\n", "---\n"])
+        self.assertEqual(meta, {})
+        self.assertEqual(list(rest), ["# Heading\n", "---\n"])
+        self.assertEqual(split_front_matter("# Heading\n"), ({}, "# Heading\n"))
+
+    def test_split(self):
+        meta, body = split_front_matter("---\ntags: []\n---\n# T\n\ntext")
+        self.assertEqual(meta, {"tags": []})
+        self.assertEqual(body, "# T\n\ntext")
+
+    def test_errors(self):
+        for lines in (
+            ["---\n", "title: x\n"],
+            ["---\n", "not a key\n", "---\n"],
+            ["---\n", "- orphan\n", "---\n"],
+        ):
+            with self.assertRaises(ValueError):
+                read_front_matter(lines)
+
+    def test_header(self):
+        lines = iter(
+            ["---\n", "date: 2024-01-02\n", "---\n", "text\n", "# T\n", "more\n"]
+        )
+        self.assertEqual(read_header(lines), {"date": "2024-01-02", "title": "T"})
+        # Nothing past the title is read.
+        self.assertEqual(list(lines), ["more\n"])
+        meta = read_header(["---\n", "title: A\n", "---\n", "# B\n"])
+        self.assertEqual(meta, {"title": "A"})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,6 +1,18 @@
+import os
+import tempfile
+import tracemalloc
 import unittest
 
-from gencontent import extract_title
+from buildcache import BuildCache
+from contentcache import ContentCache
+from gencontent import (
+    PageGenerationError,
+    collect_pages,
+    extract_title,
+    generate_page,
+    generate_pages_recursive,
+    write_output,
+)
 
 
 class TestExtractTitle(unittest.TestCase):
@@ -34,6 +46,12 @@ of text
         )
         self.assertEqual(actual, "title")
 
+    def test_front_matter_title(self):
+        actual = extract_title("---\ntitle: Given\n---\n# Heading")
+        self.assertEqual(actual, "Given")
+        actual = extract_title("---\ndate: 2024-01-02\n---\n# Heading")
+        self.assertEqual(actual, "Heading")
+
     def test_none(self):
         try:
             extract_title(
@@ -46,5 +64,152 @@ no title
             pass
 
 
+class TestParallelGeneration(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.content = os.path.join(self.tmp.name, "content")
+        self.template = os.path.join(self.tmp.name, "template.html")
+        for i in range(12):
+            page_dir = os.path.join(self.content, f"section{i % 3}", f"page{i}")
+            os.makedirs(page_dir)
+            with open(os.path.join(page_dir, "index.md"), "w") as f:
+                f.write(f"# Page {i}\n\nSome **bold** [link](/page{i}) text.")
+        with open(self.template, "w") as f:
+            f.write('<title>{{ Title }}</title><a href="/">home</a>{{ Content }}')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def read_tree(self, root):
+        files = {}
+        for dir_path, _, filenames in os.walk(root):
+            for filename in filenames:
+                path = os.path.join(dir_path, filename)
+                with open(path, "rb") as f:
+                    files[os.path.relpath(path, root)] = f.read()
+        return files
+
+    def test_parallel_matches_serial(self):
+        serial = os.path.join(self.tmp.name, "serial")
+        parallel = os.path.join(self.tmp.name, "parallel")
+        generate_pages_recursive(self.content, self.template, serial, "/base/")
+        generate_pages_recursive(
+            self.content, self.template, parallel, "/base/", jobs=3
+        )
+        self.assertEqual(len(self.read_tree(serial)), 12)
+        self.assertEqual(self.read_tree(serial), self.read_tree(parallel))
+
+    def test_failures_name_the_page(self):
+        bad_path = os.path.join(self.content, "bad.md")
+        with open(bad_path, "w") as f:
+            f.write("# Bad\n\nunclosed **bold")
+        public = os.path.join(self.tmp.name, "docs")
+        with self.assertRaises(PageGenerationError) as cm:
+            generate_pages_recursive(self.content, self.template, public, "/", jobs=2)
+        self.assertEqual([path for path, _ in cm.exception.failures], [bad_path])
+        self.assertEqual(len(self.read_tree(public)), 12)
+
+    def test_pages_are_collected_in_sorted_order(self):
+        public = os.path.join(self.tmp.name, "docs")
+        found = [from_path for from_path, _ in collect_pages(self.content, public)]
+        self.assertEqual(found, sorted(found))
+
+    def test_front_matter(self):
+        page = os.path.join(self.content, "section0", "page0", "index.md")
+        with open(page, "w") as f:
+            f.write("---\ntitle: From front matter\ntags: [a]\n---\n# Page 0\n")
+        public = os.path.join(self.tmp.name, "docs")
+        generate_pages_recursive(self.content, self.template, public, "/")
+        with open(os.path.join(public, "section0", "page0", "index.html")) as f:
+            self.assertEqual(
+                f.read(),
+                '<title>From front matter</title><a href="/">home</a>'
+                "<div><h1>Page 0</h1></div>",
+            )
+
+    def test_crlf_sources_build_the_same_pages(self):
+        public = os.path.join(self.tmp.name, "docs")
+        generate_pages_recursive(self.content, self.template, public, "/")
+        expected = self.read_tree(public)
+        for dir_path, _, filenames in os.walk(self.content):
+            for filename in filenames:
+                path = os.path.join(dir_path, filename)
+                with open(path, "rb") as f:
+                    data = f.read()
+                with open(path, "wb") as f:
+                    f.write(data.replace(b"\n", b"\r\n"))
+        crlf = os.path.join(self.tmp.name, "crlf")
+        generate_pages_recursive(self.content, self.template, crlf, "/")
+        self.assertEqual(self.read_tree(crlf), expected)
+
+
+class TestWriteOutput(unittest.TestCase):
+    def test_identical_output_is_left_untouched(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            dest = os.path.join(tmp, "blog", "index.html")
+            self.assertTrue(write_output(dest, ["<p>", "héllo</p>\n"]))
+            os.utime(dest, ns=(0, 0))
+            self.assertFalse(write_output(dest, ["<p>héllo</p>\n"]))
+            self.assertEqual(os.stat(dest).st_mtime_ns, 0)
+            self.assertTrue(write_output(dest, ["<p>changed</p>"]))
+            self.assertNotEqual(os.stat(dest).st_mtime_ns, 0)
+            with open(dest) as f:
+                self.assertEqual(f.read(), "<p>changed</p>")
+            self.assertEqual(os.listdir(os.path.dirname(dest)), ["index.html"])
+
+    def test_fragments_are_streamed(self):
+        # A 16 MiB page is written and compared without ever being joined.
+        fragment = "<p>" + "x" * 1017 + "</p>"
+        with tempfile.TemporaryDirectory() as tmp:
+            dest = os.path.join(tmp, "index.html")
+            for expected in (True, False):
+                tracemalloc.start()
+                written = write_output(dest, (fragment for _ in range(16 * 1024)))
+                _, peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+                self.assertEqual(written, expected)
+                self.assertLess(peak, 1 << 20)
+            self.assertEqual(os.path.getsize(dest), 16 * 1024 * 1024)
+
+    def test_cached_pages_are_streamed(self):
+        # A content cache hit fills the build cache on the way to the output,
+        # and a build cache hit is copied out, both without joining the page.
+        with tempfile.TemporaryDirectory() as tmp:
+            source = os.path.join(tmp, "index.md")
+            template = os.path.join(tmp, "template.html")
+            dest = os.path.join(tmp, "index.html")
+            with open(source, "w") as f:
+                f.write("# Big")
+            with open(template, "w") as f:
+                f.write("<title>{{ Title }}</title>{{ Content }}")
+            content_cache = ContentCache(os.path.join(tmp, "content"))
+            content_cache.put("ab12", "Big", "<p>" + "é" * (8 << 20) + "</p>")
+            build_cache = BuildCache(os.path.join(tmp, "build"))
+            for hits in (0, 1):
+                tracemalloc.start()
+                generate_page(
+                    source,
+                    template,
+                    dest,
+                    "/",
+                    content_cache=content_cache,
+                    source_hash="ab12",
+                    build_cache=build_cache,
+                )
+                _, peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+                self.assertEqual(build_cache.hits, hits)
+                self.assertLess(peak, 1 << 20)
+            self.assertEqual(os.path.getsize(dest), (16 << 20) + 25)
+
+    def test_newlines_are_written_as_lf(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            dest = os.path.join(tmp, "index.html")
+            write_output(dest, ["<p>a</p>\n", "<p>b</p>\n"])
+            with open(dest, "rb") as f:
+                self.assertEqual(f.read(), b"<p>a</p>\n<p>b</p>\n")
+            self.assertFalse(write_output(dest, ["<p>a</p>\n<p>b</p>\n"]))
+
+
 if __name__ == "__main__":
     unittest.main()
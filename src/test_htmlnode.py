@@ -1,3 +1,4 @@
+import io
 import unittest
 from htmlnode import LeafNode, ParentNode, HTMLNode
 
@@ -108,6 +109,43 @@ class TestHTMLNode(unittest.TestCase):
             "<h2><b>Bold text</b>Normal text<i>italic text</i>Normal text</h2>",
         )
 
+    def test_iter_html_matches_to_html(self):
+        node = ParentNode(
+            "div",
+            [
+                ParentNode("p", [LeafNode("b", "Bold"), LeafNode(None, " text")]),
+                LeafNode("a", "link", {"href": "/x", "class": "c"}),
+            ],
+            {"id": "main"},
+        )
+        self.assertEqual(
+            "".join(node.iter_html()),
+            '<div id="main"><p><b>Bold</b> text</p>'
+            '<a href="/x" class="c">link</a></div>',
+        )
+
+    def test_write_html(self):
+        node = ParentNode("ul", [ParentNode("li", [LeafNode(None, "one")])])
+        buffer = io.StringIO()
+        node.write_html(buffer)
+        self.assertEqual(buffer.getvalue(), "<ul><li>one</li></ul>")
+
+    def test_iter_html_no_children(self):
+        node = ParentNode("div", None)
+        with self.assertRaises(ValueError):
+            node.to_html()
+
+    def test_deep_tree_beyond_recursion_limit(self):
+        node = LeafNode(None, "x")
+        for _ in range(5000):
+            node = ParentNode("div", [node])
+        self.assertEqual(node.to_html(), "<div>" * 5000 + "x" + "</div>" * 5000)
+
+    def test_nested_invalid_child(self):
+        node = ParentNode("div", [ParentNode("p", [LeafNode("b", None)])])
+        with self.assertRaises(ValueError):
+            node.to_html()
+
 
 if __name__ == "__main__":
     unittest.main()
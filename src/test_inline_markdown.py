@@ -0,0 +1,74 @@
+import unittest
+
+from inline_markdown import text_to_textnodes
+from textnode import TextNode, TextType
+
+
+class TestTextToTextNodes(unittest.TestCase):
+    def test_all_types(self):
+        nodes = text_to_textnodes(
+            "This is **text** with an _italic_ word and a `code block` and an "
+            "![obi wan image](https://i.imgur.com/fJRm4Vk.jpeg) and a "
+            "[link](https://boot.dev)"
+        )
+        self.assertListEqual(
+            [
+                TextNode("This is ", TextType.TEXT),
+                TextNode("text", TextType.BOLD),
+                TextNode(" with an ", TextType.TEXT),
+                TextNode("italic", TextType.ITALIC),
+                TextNode(" word and a ", TextType.TEXT),
+                TextNode("code block", TextType.CODE),
+                TextNode(" and an ", TextType.TEXT),
+                TextNode(
+                    "obi wan image", TextType.IMAGE, "https://i.imgur.com/fJRm4Vk.jpeg"
+                ),
+                TextNode(" and a ", TextType.TEXT),
+                TextNode("link", TextType.LINK, "https://boot.dev"),
+            ],
+            nodes,
+        )
+
+    def test_plain_text(self):
+        self.assertListEqual(
+            [TextNode("just words.", TextType.TEXT)], text_to_textnodes("just words.")
+        )
+
+    def test_empty(self):
+        self.assertListEqual([], text_to_textnodes(""))
+
+    def test_code_is_not_split(self):
+        self.assertListEqual(
+            [
+                TextNode("use ", TextType.TEXT),
+                TextNode("a_b * c**d", TextType.CODE),
+                TextNode(" here", TextType.TEXT),
+            ],
+            text_to_textnodes("use `a_b * c**d` here"),
+        )
+
+    def test_link_url_with_underscores(self):
+        self.assertListEqual(
+            [TextNode("docs", TextType.LINK, "https://x.dev/a_b_c")],
+            text_to_textnodes("[docs](https://x.dev/a_b_c)"),
+        )
+
+    def test_unmatched_brackets_are_text(self):
+        self.assertListEqual(
+            [TextNode("[not a link] and ![nor this]", TextType.TEXT)],
+            text_to_textnodes("[not a link] and ![nor this]"),
+        )
+
+    def test_many_links(self):
+        text = " ".join(f"[l{i}](/p{i})" for i in range(500))
+        nodes = text_to_textnodes(text)
+        self.assertEqual(len(nodes), 999)
+        self.assertEqual(nodes[-1], TextNode("l499", TextType.LINK, "/p499"))
+
+    def test_unclosed_delimiter(self):
+        with self.assertRaises(ValueError):
+            text_to_textnodes("this is **not closed")
+
+
+if __name__ == "__main__":
+    unittest.main()
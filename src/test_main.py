@@ -0,0 +1,79 @@
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+
+class TestVerify(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.main = os.path.join(os.path.dirname(os.path.abspath(__file__)), "main.py")
+        self.site = self.tmp.name
+        os.makedirs(os.path.join(self.site, "content", "blog"))
+        os.makedirs(os.path.join(self.site, "static", "images"))
+        with open(os.path.join(self.site, "template.html"), "w") as f:
+            f.write("<title>{{ Title }}</title>{{ Content }}")
+        self.write("content/index.md", "# Home")
+        self.write("content/blog/post.md", "# Post\n\nSome **bold** text.")
+        self.write("static/images/a.png", "png")
+        self.write("static/images/a.png:Zone.Identifier", "[ZoneTransfer]")
+        self.write("static/.sitegenignore", "*:Zone.Identifier\n")
+        # An output directory from before: the same site, plus files that no
+        # build of this tree would write.
+        os.makedirs(os.path.join(self.site, "docs", "images"))
+        self.write("docs/index.html", "<title>Home</title><h1>Old</h1>")
+        self.write("docs/images/a.png:Zone.Identifier", "[ZoneTransfer]")
+        self.write("docs/removed.html", "a page whose source is gone")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, key, text):
+        with open(os.path.join(self.site, *key.split("/")), "w") as f:
+            f.write(text)
+
+    def build(self, *args):
+        return subprocess.run(
+            [sys.executable, self.main, *args],
+            cwd=self.site,
+            stdout=subprocess.PIPE,
+            text=True,
+        )
+
+    def test_verify_passes_over_an_existing_output(self):
+        result = self.build("--verify")
+        self.assertEqual(result.returncode, 0, result.stdout)
+        self.assertIn("Verified: all 3 outputs match a clean build", result.stdout)
+        self.assertEqual(
+            sorted(os.listdir(os.path.join(self.site, "docs"))),
+            ["blog", "images", "index.html"],
+        )
+
+    def test_verify_fails_on_a_changed_output(self):
+        self.assertEqual(self.build().returncode, 0)
+        self.write("docs/blog/post.html", "edited by hand")
+        result = self.build("--in-place", "--verify")
+        self.assertEqual(result.returncode, 1)
+        self.assertIn(" * blog/post.html: different", result.stdout)
+
+
+class TestRollback(unittest.TestCase):
+    def test_nothing_to_roll_back_to(self):
+        with tempfile.TemporaryDirectory() as site:
+            os.makedirs(os.path.join(site, "docs"))
+            main = os.path.join(os.path.dirname(os.path.abspath(__file__)), "main.py")
+            result = subprocess.run(
+                [sys.executable, main, "--rollback"],
+                cwd=site,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                text=True,
+            )
+        self.assertEqual(result.returncode, 1)
+        self.assertIn("Rollback failed: no previous output", result.stdout)
+        self.assertEqual(result.stderr, "")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,115 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from gencontent import generate_pages_recursive
+from manifest import BuildManifest
+from markdown_blocks import PARSER_VERSION
+
+
+class TestIncrementalBuild(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        root = self.tmp.name
+        self.content = os.path.join(root, "content")
+        self.public = os.path.join(root, "docs")
+        self.template = os.path.join(root, "template.html")
+        self.manifest_path = os.path.join(root, "manifest.json")
+        os.makedirs(os.path.join(self.content, "blog"))
+        self.write(os.path.join(self.content, "index.md"), "# Home\n\nhello")
+        self.write(os.path.join(self.content, "blog", "post.md"), "# Post\n\nbody")
+        self.write(self.template, "<title>{{ Title }}</title>{{ Content }}")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, path, text):
+        with open(path, "w") as f:
+            f.write(text)
+
+    def build(self, basepath="/", changed=None):
+        manifest = BuildManifest(self.manifest_path)
+        generate_pages_recursive(
+            self.content,
+            self.template,
+            self.public,
+            basepath,
+            manifest,
+            changed=changed,
+        )
+        manifest.save()
+        return manifest
+
+    def test_first_build_renders_everything(self):
+        manifest = self.build()
+        self.assertEqual(manifest.rebuilt, 2)
+        self.assertEqual(manifest.skipped, 0)
+
+    def test_unchanged_pages_are_skipped(self):
+        self.build()
+        manifest = self.build()
+        self.assertEqual(manifest.rebuilt, 0)
+        self.assertEqual(manifest.skipped, 2)
+
+    def test_edited_page_is_rebuilt(self):
+        self.build()
+        self.write(os.path.join(self.content, "index.md"), "# Home\n\nchanged")
+        manifest = self.build()
+        self.assertEqual(manifest.rebuilt, 1)
+        with open(os.path.join(self.public, "index.html")) as f:
+            self.assertIn("changed", f.read())
+
+    def test_changed_ignored_files_are_not_built(self):
+        self.build()
+        ignore = os.path.join(self.content, ".sitegenignore")
+        swap = os.path.join(self.content, ".index.md.swp")
+        self.write(ignore, ".*.swp\n")
+        self.write(swap, "editor state")
+        manifest = self.build(changed={ignore, swap})
+        self.assertEqual(manifest.rebuilt, 0)
+        self.assertEqual(sorted(os.listdir(self.public)), ["blog", "index.html"])
+
+    def test_template_change_rebuilds_everything(self):
+        self.build()
+        self.write(self.template, "<h1>{{ Title }}</h1>{{ Content }}")
+        self.assertEqual(self.build().rebuilt, 2)
+
+    def test_basepath_change_rebuilds_everything(self):
+        self.build()
+        self.assertEqual(self.build("/site/").rebuilt, 2)
+
+    def test_parser_change_rebuilds_everything(self):
+        self.build()
+        with mock.patch("manifest.PARSER_VERSION", PARSER_VERSION + 1):
+            self.assertEqual(self.build().rebuilt, 2)
+            self.assertEqual(self.build().rebuilt, 0)
+
+    def test_missing_output_is_rebuilt(self):
+        self.build()
+        os.remove(os.path.join(self.public, "index.html"))
+        self.assertEqual(self.build().rebuilt, 1)
+
+    def test_deleted_source_removes_page(self):
+        self.build()
+        os.remove(os.path.join(self.content, "blog", "post.md"))
+        self.build()
+        self.assertFalse(os.path.exists(os.path.join(self.public, "blog")))
+        self.assertTrue(os.path.exists(os.path.join(self.public, "index.html")))
+
+    def test_changed_pages_only(self):
+        self.build()
+        index = os.path.join(self.content, "index.md")
+        post = os.path.join(self.content, "blog", "post.md")
+        self.write(index, "# Home\n\nchanged")
+        os.remove(post)
+        manifest = self.build(changed={index, post})
+        self.assertEqual((manifest.rebuilt, manifest.skipped), (1, 0))
+        self.assertEqual(list(manifest.pages), ["index.md"])
+        self.assertFalse(os.path.exists(os.path.join(self.public, "blog")))
+        with open(os.path.join(self.public, "index.html")) as f:
+            self.assertIn("changed", f.read())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,138 @@
+import io
+import unittest
+
+from markdown_blocks import (
+    BlockType,
+    block_to_block_type,
+    iter_blocks,
+    markdown_to_blocks,
+    markdown_to_html_node,
+)
+
+
+class TestMarkdownToBlocks(unittest.TestCase):
+    def test_markdown_to_blocks(self):
+        md = """
+This is **bolded** paragraph
+
+This is another paragraph with _italic_ text and `code` here
+This is the same paragraph on a new line
+
+- This is a list
+- with items
+"""
+        self.assertEqual(
+            markdown_to_blocks(md),
+            [
+                "This is **bolded** paragraph",
+                "This is another paragraph with _italic_ text and `code` here\n"
+                "This is the same paragraph on a new line",
+                "- This is a list\n- with items",
+            ],
+        )
+
+    def test_extra_blank_lines(self):
+        self.assertEqual(markdown_to_blocks("one\n\n\n\n  two  \n\n"), ["one", "two"])
+
+    def test_iter_blocks_types_and_lines(self):
+        blocks = list(iter_blocks("# Title\n\n- a\n- b\n\n> quote\n> more"))
+        self.assertEqual(
+            blocks,
+            [
+                (BlockType.HEADING, ["# Title"]),
+                (BlockType.ULIST, ["- a", "- b"]),
+                (BlockType.QUOTE, ["> quote", "> more"]),
+            ],
+        )
+
+    def test_fence_keeps_blank_lines(self):
+        blocks = list(iter_blocks("```\nfirst\n\nsecond\n```\n\nafter"))
+        self.assertEqual(
+            blocks,
+            [
+                (BlockType.CODE, ["```", "first", "", "second", "```"]),
+                (BlockType.PARAGRAPH, ["after"]),
+            ],
+        )
+
+    def test_inline_code_does_not_open_a_fence(self):
+        blocks = list(iter_blocks("```inline``` text\n\nSecond paragraph\n\n# Heading"))
+        self.assertEqual(
+            blocks,
+            [
+                (BlockType.PARAGRAPH, ["```inline``` text"]),
+                (BlockType.PARAGRAPH, ["Second paragraph"]),
+                (BlockType.HEADING, ["# Heading"]),
+            ],
+        )
+
+    def test_unclosed_fence_splits_on_blank_lines(self):
+        md = "```a code\nspan``` starts this paragraph.\n\n# Next section\n\n- item"
+        self.assertEqual(
+            markdown_to_html_node(md).to_html(),
+            "<div><p><code>a code span</code> starts this paragraph.</p>"
+            "<h1>Next section</h1><ul><li>item</li></ul></div>",
+        )
+        blocks = list(iter_blocks("```python\nx = 1\n\n# never closed"))
+        self.assertEqual(
+            blocks,
+            [
+                (BlockType.PARAGRAPH, ["```python", "x = 1"]),
+                (BlockType.HEADING, ["# never closed"]),
+            ],
+        )
+
+    def test_iterable_of_lines(self):
+        md = "# Title\n\nsome **text**\nmore\n\n1. one\n2. two\n"
+        self.assertEqual(
+            list(iter_blocks(io.StringIO(md))), list(iter_blocks(md))
+        )
+
+
+class TestBlockToBlockType(unittest.TestCase):
+    def test_block_types(self):
+        self.assertEqual(block_to_block_type("### heading"), BlockType.HEADING)
+        self.assertEqual(block_to_block_type("```\ncode\n```"), BlockType.CODE)
+        self.assertEqual(block_to_block_type("> a\n> b"), BlockType.QUOTE)
+        self.assertEqual(block_to_block_type("> a\nb"), BlockType.PARAGRAPH)
+        self.assertEqual(block_to_block_type("- a\n- b"), BlockType.ULIST)
+        self.assertEqual(block_to_block_type("1. a\n2. b"), BlockType.OLIST)
+        self.assertEqual(block_to_block_type("1. a\n3. b"), BlockType.PARAGRAPH)
+
+
+class TestMarkdownToHTMLNode(unittest.TestCase):
+    def test_paragraphs(self):
+        md = """
+This is **bolded** paragraph
+text in a p
+tag here
+
+This is another paragraph with _italic_ text and `code` here
+"""
+        self.assertEqual(
+            markdown_to_html_node(md).to_html(),
+            "<div><p>This is <b>bolded</b> paragraph text in a p tag here</p>"
+            "<p>This is another paragraph with <i>italic</i> text and "
+            "<code>code</code> here</p></div>",
+        )
+
+    def test_codeblock_with_blank_line(self):
+        md = "```\nThis is text that _should_ remain\n\nthe **same** even with inline stuff\n```"
+        self.assertEqual(
+            markdown_to_html_node(md).to_html(),
+            "<div><pre><code>This is text that _should_ remain\n\n"
+            "the **same** even with inline stuff\n</code></pre></div>",
+        )
+
+    def test_lists_and_quote(self):
+        md = "- a\n- **b**\n\n1. one\n2. two\n\n> quoted\n> text"
+        self.assertEqual(
+            markdown_to_html_node(md).to_html(),
+            "<div><ul><li>a</li><li><b>b</b></li></ul>"
+            "<ol><li>one</li><li>two</li></ol>"
+            "<blockquote>quoted text</blockquote></div>",
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,137 @@
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+
+from manifest import BuildManifest
+from merge import ShardMergeError, merge_shards
+
+
+class TestMergeShards(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.public = os.path.join(self.tmp.name, "docs")
+        self.manifest = BuildManifest(os.path.join(self.tmp.name, "manifest.json"))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def shard(self, name, files, pages=(), static=None):
+        shard_dir = os.path.join(self.tmp.name, name)
+        for key, text in files.items():
+            path = os.path.join(shard_dir, "docs", key)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "w") as f:
+                f.write(text)
+        manifest = BuildManifest(os.path.join(shard_dir, ".sitegen", "manifest.json"))
+        for key in pages:
+            manifest.pages[key] = {"dest": key.replace(".md", ".html")}
+        if static is None:
+            static = [key for key in files if not key.endswith(".html")]
+        manifest.static = static
+        manifest.save()
+        return shard_dir
+
+    def merge(self, shard_dirs):
+        return merge_shards(shard_dirs, self.public, self.manifest, "docs", ".sitegen")
+
+    def test_merge(self):
+        first = self.shard("s1", {"index.html": "home", "a.css": "css"}, ["index.md"])
+        second = self.shard("s2", {"blog/b.html": "b"}, ["blog/b.md"])
+        staging_dir, merged = self.merge([first, second])
+        self.assertEqual(merged, 3)
+        with open(os.path.join(staging_dir, "blog", "b.html")) as f:
+            self.assertEqual(f.read(), "b")
+        self.assertEqual(sorted(self.manifest.pages), ["blog/b.md", "index.md"])
+        self.assertEqual(self.manifest.static, ["a.css"])
+
+    def test_collisions_fail_before_writing(self):
+        first = self.shard("s1", {"index.html": "home"}, ["index.md"])
+        second = self.shard("s2", {"index.html": "other"}, static=["index.html"])
+        with self.assertRaises(ShardMergeError) as cm:
+            self.merge([first, second])
+        self.assertEqual([key for key, _, _ in cm.exception.collisions], ["index.html"])
+        self.assertFalse(os.path.exists(self.public + ".staging"))
+        self.assertEqual(self.manifest.pages, {})
+
+    def test_only_owned_files_are_merged(self):
+        first = self.shard(
+            "s1", {"index.html": "home", "old.html": "stale"}, ["index.md"]
+        )
+        second = self.shard("s2", {"index.html": "stale", "a.css": "css"})
+        staging_dir, merged = self.merge([first, second])
+        self.assertEqual(merged, 2)
+        self.assertEqual(sorted(os.listdir(staging_dir)), ["a.css", "index.html"])
+        with open(os.path.join(staging_dir, "index.html")) as f:
+            self.assertEqual(f.read(), "home")
+
+    def test_missing_shard(self):
+        with self.assertRaises(ValueError):
+            self.merge([os.path.join(self.tmp.name, "missing")])
+
+
+class TestShardedBuild(unittest.TestCase):
+    # Real builds through main.py, each shard in its own copy of a site whose
+    # docs/ already holds a full build, as in a fresh clone of a repo that
+    # commits its output.
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.main = os.path.join(os.path.dirname(os.path.abspath(__file__)), "main.py")
+        self.site = os.path.join(self.tmp.name, "site")
+        os.makedirs(os.path.join(self.site, "content", "blog"))
+        os.makedirs(os.path.join(self.site, "static", "images"))
+        with open(os.path.join(self.site, "template.html"), "w") as f:
+            f.write("<title>{{ Title }}</title>{{ Content }}")
+        for i in range(6):
+            self.write(f"content/blog/post{i}.md", f"# Post {i}\n\n" + "text " * i)
+        self.write("content/index.md", "# Home")
+        self.write("static/index.css", "body {}")
+        self.write("static/images/a.png", "png" * 100)
+        self.build(self.site)
+        self.write("docs/stale.html", "left by an older build")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, key, text):
+        with open(os.path.join(self.site, *key.split("/")), "w") as f:
+            f.write(text)
+
+    def build(self, cwd, *args):
+        subprocess.run(
+            [sys.executable, self.main, *args],
+            cwd=cwd,
+            check=True,
+            stdout=subprocess.DEVNULL,
+        )
+
+    def read_tree(self, root):
+        files = {}
+        for dir_path, _, filenames in os.walk(root):
+            for filename in filenames:
+                path = os.path.join(dir_path, filename)
+                with open(path, "rb") as f:
+                    files[os.path.relpath(path, root)] = f.read()
+        return files
+
+    def test_shards_merge_into_a_full_build(self):
+        shard_dirs = []
+        for i in (1, 2):
+            shard_dir = os.path.join(self.tmp.name, f"shard-{i}")
+            shutil.copytree(self.site, shard_dir)
+            shutil.rmtree(os.path.join(shard_dir, ".sitegen"))
+            self.build(shard_dir, "--shard", f"{i}/2")
+            shard_dirs.append(shard_dir)
+        merged = os.path.join(self.tmp.name, "merged")
+        os.mkdir(merged)
+        self.build(merged, "merge", *shard_dirs)
+        full = self.read_tree(os.path.join(self.site, "docs"))
+        del full["stale.html"]
+        self.assertEqual(len(full), 9)
+        self.assertEqual(self.read_tree(os.path.join(merged, "docs")), full)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,64 @@
+import os
+import tempfile
+import unittest
+
+from metadata import MetadataIndex
+
+
+class TestMetadataIndex(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.content = os.path.join(self.tmp.name, "content")
+        self.path = os.path.join(self.tmp.name, "metadata.json")
+        self.write("index.md", "# Home\n\nBody")
+        self.write(
+            "blog/a.md", "---\ndate: 2024-02-01\ntags: [news]\n---\n# A\n"
+        )
+        self.write(
+            "blog/b.md", "---\ntitle: B\ndate: 2024-03-01\ntags: news\n---\nBody"
+        )
+        self.write("blog/c.md", "---\ndate: 2024-04-01\ndraft: true\n---\n# C\n")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, key, text):
+        path = os.path.join(self.content, *key.split("/"))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(text)
+
+    def test_query(self):
+        index = MetadataIndex(self.content, self.path)
+        self.assertEqual(
+            [key for key, _ in index.query()], ["blog/b.md", "blog/a.md", "index.md"]
+        )
+        self.assertEqual(
+            [meta["title"] for _, meta in index.query(tag="news")], ["B", "A"]
+        )
+        self.assertEqual(index.query(drafts=True)[0][0], "blog/c.md")
+
+    def test_only_changed_headers_are_read_again(self):
+        index = MetadataIndex(self.content, self.path)
+        self.assertEqual(index.pages, {})
+        index.query()
+        self.assertEqual(index.read, 4)
+        index.save()
+        self.write("blog/a.md", "---\ndate: 2024-05-01\n---\n# A2\n")
+        os.remove(os.path.join(self.content, "index.md"))
+        index = MetadataIndex(self.content, self.path)
+        results = index.query()
+        self.assertEqual(index.read, 1)
+        self.assertEqual(
+            results[0], ("blog/a.md", {"date": "2024-05-01", "title": "A2"})
+        )
+        self.assertNotIn("index.md", index.pages)
+
+    def test_bad_front_matter_names_the_page(self):
+        self.write("bad.md", "---\ntitle: x\n")
+        with self.assertRaisesRegex(ValueError, "bad.md"):
+            MetadataIndex(self.content).query()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,61 @@
+import json
+import os
+import tempfile
+import unittest
+
+from gencontent import generate_pages_recursive
+from profiling import PROFILE_STAGES, BuildProfile
+
+
+class TestBuildProfile(unittest.TestCase):
+    def test_report_orders_slowest_first(self):
+        profile = BuildProfile()
+        profile.record("fast.md", {"read": 0.001, "parse": 0.002}, 10)
+        profile.record("slow.md", {"parse": 0.5, "write": 0.1}, 20, cached=True)
+        self.assertEqual([e["page"] for e in profile.slowest(1)], ["slow.md"])
+        totals = profile.totals()
+        self.assertAlmostEqual(totals["parse"], 0.502)
+        self.assertEqual(totals["bytes"], 30)
+        report = profile.report(1)
+        self.assertIn("slow.md (cached)", report)
+        self.assertNotIn("fast.md", report)
+
+    def test_drain_and_absorb(self):
+        worker = BuildProfile()
+        worker.record("a.md", {"read": 0.1}, 1)
+        parent = BuildProfile()
+        parent.absorb(worker.drain())
+        self.assertEqual(worker.pages, [])
+        self.assertEqual(len(parent.pages), 1)
+
+    def test_build_records_every_page(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            content = os.path.join(tmp, "content")
+            public = os.path.join(tmp, "docs")
+            template = os.path.join(tmp, "template.html")
+            os.makedirs(os.path.join(content, "blog"))
+            with open(os.path.join(content, "index.md"), "w") as f:
+                f.write("# Home\n\nhello")
+            with open(os.path.join(content, "blog", "index.md"), "w") as f:
+                f.write("# Blog\n\n- a\n- b")
+            with open(template, "w") as f:
+                f.write("<title>{{ Title }}</title>{{ Content }}")
+            profile = BuildProfile()
+            generate_pages_recursive(content, template, public, "/", profile=profile)
+            self.assertEqual(len(profile.pages), 2)
+            with open(os.path.join(public, "index.html")) as f:
+                page = f.read()
+            self.assertEqual(page, "<title>Home</title><div><h1>Home</h1><p>hello</p></div>")
+            entries = {entry["page"]: entry for entry in profile.pages}
+            entry = entries[os.path.join(content, "index.md")]
+            for stage in PROFILE_STAGES:
+                self.assertGreaterEqual(entry[stage], 0.0)
+            self.assertEqual(entry["bytes"], len(page))
+            path = os.path.join(tmp, "profile.json")
+            profile.save(path)
+            with open(path) as f:
+                self.assertEqual(json.load(f)["totals"]["pages"], 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,68 @@
+import os
+import tempfile
+import unittest
+
+from gencontent import generate_pages_recursive
+from shard import parse_shard, partition_by_size, select_shard
+
+
+class TestShard(unittest.TestCase):
+    def test_parse_shard(self):
+        self.assertEqual(parse_shard("2/4"), (2, 4))
+        for text in ("0/4", "5/4", "1/0", "1", "a/b"):
+            with self.assertRaises(ValueError):
+                parse_shard(text)
+
+    def test_partition_balances_size(self):
+        sizes = {"a": 10, "b": 7, "c": 5, "d": 4, "e": 2, "f": 2}
+        shards = partition_by_size(sizes, 2)
+        self.assertEqual(shards, [["a", "d", "f"], ["b", "c", "e"]])
+        self.assertEqual(sorted(sum(shards, [])), sorted(sizes))
+
+    def test_partition_is_deterministic(self):
+        sizes = {f"page{i}.md": 3 for i in range(7)}
+        shards = partition_by_size(sizes, 3)
+        self.assertEqual(shards, partition_by_size(dict(reversed(sizes.items())), 3))
+        self.assertEqual([len(keys) for keys in shards], [3, 2, 2])
+
+    def test_more_shards_than_items(self):
+        self.assertEqual(partition_by_size({"a": 1}, 3), [["a"], [], []])
+
+
+class TestShardedBuild(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.content = os.path.join(self.tmp.name, "content")
+        os.makedirs(os.path.join(self.content, "blog"))
+        self.template = os.path.join(self.tmp.name, "template.html")
+        with open(self.template, "w") as f:
+            f.write("<title>{{ Title }}</title>{{ Content }}")
+        for key, size in (("index.md", 40), ("blog/a.md", 30), ("blog/b.md", 20)):
+            with open(os.path.join(self.content, key), "w") as f:
+                f.write("# T\n\n" + "x" * size)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def build(self, shard):
+        dest = os.path.join(self.tmp.name, f"docs{shard[0]}")
+        generate_pages_recursive(self.content, self.template, dest, "/", shard=shard)
+        outputs = []
+        for dir_path, _, filenames in os.walk(dest):
+            for filename in filenames:
+                outputs.append(os.path.relpath(os.path.join(dir_path, filename), dest))
+        return sorted(outputs)
+
+    def test_shards_cover_every_page_once(self):
+        first = self.build((1, 2))
+        second = self.build((2, 2))
+        self.assertEqual(first, ["index.html"])
+        self.assertEqual(second, ["blog/a.html", "blog/b.html"])
+
+    def test_select_without_shard(self):
+        items = [("x", "y")]
+        self.assertIs(select_shard(items, ["x"], None), items)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,80 @@
+import os
+import tempfile
+import unittest
+
+from gencontent import write_output
+from staging import (
+    discard_staging,
+    publish_output,
+    rollback_output,
+    stage_output,
+    swap_paths,
+)
+
+
+class TestStaging(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.public = os.path.join(self.tmp.name, "docs")
+        os.makedirs(os.path.join(self.public, "blog"))
+        self.write(os.path.join(self.public, "index.html"), "old home")
+        self.write(os.path.join(self.public, "blog", "index.html"), "old blog")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, path, text):
+        with open(path, "w") as f:
+            f.write(text)
+
+    def read(self, path):
+        with open(path) as f:
+            return f.read()
+
+    def test_staging_starts_from_published_output(self):
+        staging = stage_output(self.public)
+        self.assertEqual(self.read(os.path.join(staging, "blog", "index.html")), "old blog")
+
+    def test_writes_to_staging_leave_output_alone(self):
+        staging = stage_output(self.public)
+        write_output(os.path.join(staging, "index.html"), ["new ", "home"])
+        self.assertEqual(self.read(os.path.join(self.public, "index.html")), "old home")
+        self.assertEqual(self.read(os.path.join(staging, "index.html")), "new home")
+
+    def test_publish_and_rollback(self):
+        staging = stage_output(self.public)
+        write_output(os.path.join(staging, "index.html"), ["new home"])
+        publish_output(self.public)
+        self.assertFalse(os.path.exists(staging))
+        self.assertEqual(self.read(os.path.join(self.public, "index.html")), "new home")
+        rollback_output(self.public)
+        self.assertEqual(self.read(os.path.join(self.public, "index.html")), "old home")
+        rollback_output(self.public)
+        self.assertEqual(self.read(os.path.join(self.public, "index.html")), "new home")
+
+    def test_first_publish_without_output(self):
+        public = os.path.join(self.tmp.name, "fresh")
+        staging = stage_output(public)
+        write_output(os.path.join(staging, "index.html"), ["home"])
+        publish_output(public)
+        self.assertEqual(self.read(os.path.join(public, "index.html")), "home")
+        with self.assertRaises(ValueError):
+            rollback_output(public)
+
+    def test_discard_staging(self):
+        staging = stage_output(self.public)
+        discard_staging(self.public)
+        self.assertFalse(os.path.exists(staging))
+        self.assertEqual(self.read(os.path.join(self.public, "index.html")), "old home")
+
+    def test_swap_paths(self):
+        a = os.path.join(self.tmp.name, "a")
+        b = os.path.join(self.tmp.name, "b")
+        self.write(a, "a")
+        self.write(b, "b")
+        swap_paths(a, b)
+        self.assertEqual((self.read(a), self.read(b)), ("b", "a"))
+
+
+if __name__ == "__main__":
+    unittest.main()
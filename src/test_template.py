@@ -0,0 +1,69 @@
+import unittest
+
+from template import Template, iter_rewrite_root_urls
+
+
+class TestTemplate(unittest.TestCase):
+    def test_render(self):
+        template = Template("<title>{{ Title }}</title><body>{{ Content }}</body>")
+        self.assertEqual(
+            template.render("Hi", "<p>text</p>", "/"),
+            "<title>Hi</title><body><p>text</p></body>",
+        )
+
+    def test_repeated_placeholders(self):
+        template = Template("{{ Title }}|{{ Title }}|{{ Content }}")
+        self.assertEqual(template.render("a", "b", "/"), "a|a|b")
+
+    def test_basepath_rewrites_template_and_content(self):
+        template = Template('<link href="/index.css" />{{ Content }}')
+        self.assertEqual(
+            template.render(
+                "t", '<a href="/blog">x</a><img src="/a.png" alt="a"></img>', "/site/"
+            ),
+            '<link href="/site/index.css" /><a href="/site/blog">x</a>'
+            '<img src="/site/a.png" alt="a"></img>',
+        )
+
+    def test_matches_chained_replace(self):
+        text = '<head><link href="/x.css"></head>{{ Title }}<main>{{ Content }}</main>'
+        title = "Title"
+        content = '<a href="/a">a</a><a href="https://b">b</a><img src="/c"></img>'
+        expected = text.replace("{{ Title }}", title)
+        expected = expected.replace("{{ Content }}", content)
+        expected = expected.replace('href="/', 'href="/base/')
+        expected = expected.replace('src="/', 'src="/base/')
+        self.assertEqual(Template(text).render(title, content, "/base/"), expected)
+
+    def test_content_is_not_rescanned_for_placeholders(self):
+        template = Template("{{ Content }}")
+        self.assertEqual(template.render("t", "{{ Title }}", "/"), "{{ Title }}")
+
+    def test_iter_render_matches_render(self):
+        template = Template('<link href="/x.css">{{ Title }}{{ Content }}</body>')
+        content = '<a href="/a">a</a><img src="/b"></img>'
+        fragments = ["<a hr", 'ef="', '/a">a</a><img s', 'rc="/b"></img>']
+        self.assertEqual(
+            "".join(template.iter_render("t", iter(fragments), "/base/")),
+            template.render("t", content, "/base/"),
+        )
+
+    def test_iter_render_repeated_content(self):
+        template = Template("{{ Content }}|{{ Content }}")
+        self.assertEqual(
+            "".join(template.iter_render("t", iter(["a", "b"]), "/")), "ab|ab"
+        )
+
+
+class TestIterRewriteRootUrls(unittest.TestCase):
+    def test_url_split_across_every_fragment(self):
+        html = '<a href="/x">x</a><img src="/y"></img>'
+        expected = '<a href="/base/x">x</a><img src="/base/y"></img>'
+        self.assertEqual("".join(iter_rewrite_root_urls(list(html), "/base/")), expected)
+
+    def test_partial_prefix_at_end(self):
+        self.assertEqual("".join(iter_rewrite_root_urls(["a", 'href="'], "/b/")), 'ahref="')
+
+
+if __name__ == "__main__":
+    unittest.main()
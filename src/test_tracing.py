@@ -0,0 +1,58 @@
+import json
+import os
+import tempfile
+import unittest
+
+from copystatic import sync_static
+from gencontent import generate_pages_recursive
+from tracing import BuildTrace, span
+
+
+class TestBuildTrace(unittest.TestCase):
+    def test_span_records_complete_event(self):
+        trace = BuildTrace()
+        with span(trace, "outer", "main", path="x"):
+            with span(trace, "inner", "main"):
+                pass
+        names = [e["name"] for e in trace.events if e["ph"] == "X"]
+        self.assertEqual(names, ["inner", "outer"])
+        outer = trace.events[-1]
+        self.assertEqual(outer["args"], {"path": "x"})
+        self.assertEqual(outer["pid"], os.getpid())
+        self.assertGreaterEqual(outer["dur"], trace.events[-2]["dur"])
+        self.assertEqual(trace.events[0]["args"], {"name": "main"})
+
+    def test_span_without_trace(self):
+        with span(None, "nothing", "main"):
+            pass
+
+    def test_build_spans(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            static = os.path.join(tmp, "static")
+            content = os.path.join(tmp, "content")
+            public = os.path.join(tmp, "docs")
+            template = os.path.join(tmp, "template.html")
+            os.makedirs(os.path.join(static, "images"))
+            os.makedirs(content)
+            with open(os.path.join(static, "images", "a.png"), "wb") as f:
+                f.write(b"png")
+            with open(os.path.join(content, "index.md"), "w") as f:
+                f.write("# Home")
+            with open(template, "w") as f:
+                f.write("{{ Title }}{{ Content }}")
+            trace = BuildTrace()
+            sync_static(static, public, trace=trace)
+            generate_pages_recursive(content, template, public, "/", trace=trace)
+            path = os.path.join(tmp, "trace.json")
+            trace.save(path)
+            with open(path) as f:
+                events = json.load(f)["traceEvents"]
+            names = [e["name"] for e in events if e["ph"] == "X"]
+            self.assertEqual(names.count("walk_static"), 1)
+            self.assertEqual(names.count("copy_file"), 1)
+            self.assertEqual(names.count("generate_page"), 1)
+            self.assertIn("collect_pages", names)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,72 @@
+import os
+import tempfile
+import unittest
+
+from walk import IgnoreRules, walk_files
+
+
+class TestWalk(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+        for key in (
+            "b.txt",
+            "a/z.png",
+            "a/z.png:Zone.Identifier",
+            "a/b/c.css",
+            "build/out.txt",
+            "drafts/x.md",
+            "notes/drafts/y.md",
+        ):
+            self.write(key, key)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, key, text):
+        path = os.path.join(self.root, *key.split("/"))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(text)
+
+    def keys(self, rules=None):
+        return [key for _, key in walk_files(self.root, rules)]
+
+    def test_sorted_depth_first(self):
+        self.assertEqual(
+            self.keys(),
+            [
+                "a/b/c.css",
+                "a/z.png",
+                "a/z.png:Zone.Identifier",
+                "b.txt",
+                "build/out.txt",
+                "drafts/x.md",
+                "notes/drafts/y.md",
+            ],
+        )
+
+    def test_entries(self):
+        entry, key = next(walk_files(self.root))
+        self.assertEqual(entry.path, os.path.join(self.root, "a", "b", "c.css"))
+        self.assertEqual(entry.stat().st_size, len(key))
+
+    def test_ignore_file(self):
+        self.write(".sitegenignore", "# junk\n\n*:Zone.Identifier\n/drafts/\nbuild\n")
+        self.assertEqual(
+            self.keys(), ["a/b/c.css", "a/z.png", "b.txt", "notes/drafts/y.md"]
+        )
+
+    def test_rules(self):
+        rules = IgnoreRules(["*.png", "a/b/", "notes/*/y.md"])
+        self.assertTrue(rules.ignores("a/z.png"))
+        self.assertTrue(rules.ignores("a/b", True))
+        self.assertFalse(rules.ignores("a/b"))
+        self.assertTrue(rules.ignores("notes/drafts/y.md"))
+        self.assertFalse(rules.ignores("drafts/y.md"))
+        self.assertTrue(rules.ignores_path("a/b/c.css"))
+        self.assertFalse(rules.ignores_path("a/c.css"))
+
+
+if __name__ == "__main__":
+    unittest.main()
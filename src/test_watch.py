@@ -0,0 +1,52 @@
+import os
+import tempfile
+import threading
+import time
+import unittest
+
+from watch import changed_paths, snapshot, wait_for_changes
+
+
+class TestWatch(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.content = os.path.join(self.tmp.name, "content")
+        os.makedirs(os.path.join(self.content, "blog"))
+        self.page = os.path.join(self.content, "blog", "post.md")
+        self.write(self.page, "# Post")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, path, text):
+        with open(path, "w") as f:
+            f.write(text)
+
+    def test_changed_paths(self):
+        before = snapshot([self.content])
+        self.assertEqual(list(before), [self.page])
+        other = os.path.join(self.content, "index.md")
+        self.write(other, "# Home")
+        os.remove(self.page)
+        after = snapshot([self.content, os.path.join(self.tmp.name, "missing")])
+        self.assertEqual(changed_paths(before, after), {self.page, other})
+
+    def test_burst_is_debounced_into_one_change_set(self):
+        files = snapshot([self.content])
+        paths = [os.path.join(self.content, f"page{i}.md") for i in range(3)]
+
+        def edit():
+            for path in paths:
+                self.write(path, "# Page")
+                time.sleep(0.01)
+
+        thread = threading.Thread(target=edit)
+        thread.start()
+        changed, files = wait_for_changes([self.content], files, 0.01, 0.1)
+        thread.join()
+        self.assertEqual(changed, set(paths))
+        self.assertEqual(len(files), 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,74 @@
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+
+
+class BuildTrace:
+    # Spans in the Chrome trace-event format, which chrome://tracing and
+    # Perfetto both open. perf_counter is system-wide, so spans recorded in
+    # pool workers line up with the parent's on one timeline.
+    def __init__(self):
+        self.origin = time.perf_counter_ns()
+        self.main_pid = os.getpid()
+        self.events = []
+        self._named = set()
+
+    def now(self):
+        return (time.perf_counter_ns() - self.origin) / 1000
+
+    @contextmanager
+    def span(self, name, category, **args):
+        start = self.now()
+        try:
+            yield
+        finally:
+            self.add(name, category, start, self.now() - start, args)
+
+    def add(self, name, category, start, duration, args=None):
+        pid = os.getpid()
+        tid = threading.get_native_id()
+        if pid not in self._named:
+            # Label each process once, so workers read as such in the viewer.
+            self._named.add(pid)
+            label = "main" if pid == self.main_pid else f"worker {pid}"
+            self.events.append(
+                {"name": "process_name", "ph": "M", "pid": pid, "args": {"name": label}}
+            )
+        event = {
+            "name": name,
+            "cat": category,
+            "ph": "X",
+            "ts": start,
+            "dur": duration,
+            "pid": pid,
+            "tid": tid,
+        }
+        if args:
+            event["args"] = args
+        self.events.append(event)
+
+    def drain(self):
+        events = self.events
+        self.events = []
+        return events
+
+    def absorb(self, events):
+        self.events.extend(events)
+
+    def save(self, path):
+        dir_path = os.path.dirname(path)
+        if dir_path != "":
+            os.makedirs(dir_path, exist_ok=True)
+        data = {"traceEvents": self.events, "displayTimeUnit": "ms"}
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(data, f, separators=(",", ":"))
+        os.replace(tmp_path, path)
+
+
+def span(trace, name, category, **args):
+    if trace is None:
+        return nullcontext()
+    return trace.span(name, category, **args)
@@ -0,0 +1,79 @@
+import os
+from fnmatch import fnmatchcase
+
+
+IGNORE_FILE_NAME = ".sitegenignore"
+
+
+class IgnoreRules:
+    # Glob patterns, one per line as in a .sitegenignore file. A pattern
+    # matches a file or directory name anywhere below the walked directory,
+    # or with a "/" in it, the whole path from there ("/" at the start only
+    # anchors it). A trailing "/" matches directories only.
+    def __init__(self, lines=()):
+        self.patterns = []
+        for line in lines:
+            line = line.strip()
+            if line == "" or line.startswith("#"):
+                continue
+            dir_only = line.endswith("/")
+            line = line.rstrip("/")
+            anchored = "/" in line
+            self.patterns.append((line.lstrip("/"), anchored, dir_only))
+
+    def ignores(self, key, is_dir=False):
+        name = key.rpartition("/")[2]
+        for pattern, anchored, dir_only in self.patterns:
+            if dir_only and not is_dir:
+                continue
+            if fnmatchcase(key if anchored else name, pattern):
+                return True
+        return False
+
+    def ignores_path(self, key):
+        # For a path found some other way than walking (e.g. from a URL):
+        # it is ignored if it or any directory above it is.
+        parts = key.split("/")
+        for i in range(1, len(parts)):
+            if self.ignores("/".join(parts[:i]), True):
+                return True
+        return self.ignores(key)
+
+
+def load_ignore_rules(dir_path):
+    path = os.path.join(dir_path, IGNORE_FILE_NAME)
+    try:
+        with open(path, "r") as f:
+            return IgnoreRules(f.readlines())
+    except FileNotFoundError:
+        return IgnoreRules()
+
+
+def walk_files(dir_path, rules=None):
+    # Yields (DirEntry, key) for every file below dir_path, key being its
+    # posix path relative to dir_path. Depth first with each directory
+    # sorted by name, the same order as a sorted recursive listdir, but
+    # without recursion and with one directory in memory at a time. The
+    # DirEntry already knows its type, so no file costs a stat to classify.
+    # Unless rules are given, dir_path's own .sitegenignore applies; the file
+    # itself is never yielded.
+    if rules is None:
+        rules = load_ignore_rules(dir_path)
+    stack = [(iter(scan_sorted(dir_path)), "")]
+    while stack:
+        entries, prefix = stack[-1]
+        entry = next(entries, None)
+        if entry is None:
+            stack.pop()
+            continue
+        key = prefix + entry.name
+        if entry.is_dir():
+            if not rules.ignores(key, True):
+                stack.append((iter(scan_sorted(entry.path)), key + "/"))
+        elif key != IGNORE_FILE_NAME and not rules.ignores(key):
+            yield entry, key
+
+
+def scan_sorted(dir_path):
+    with os.scandir(dir_path) as entries:
+        return sorted(entries, key=lambda entry: entry.name)
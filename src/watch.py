@@ -0,0 +1,62 @@
+import os
+import time
+
+
+def snapshot(paths):
+    # Size and mtime of every file under paths, which is all a polling
+    # watcher can afford to look at on a large site.
+    files = {}
+    for path in paths:
+        if os.path.isdir(path):
+            scan_dir(path, files)
+        elif os.path.exists(path):
+            stat = os.stat(path)
+            files[path] = (stat.st_size, stat.st_mtime_ns)
+    return files
+
+
+def scan_dir(dir_path, files):
+    with os.scandir(dir_path) as entries:
+        for entry in entries:
+            if entry.is_dir():
+                scan_dir(entry.path, files)
+            else:
+                stat = entry.stat()
+                files[entry.path] = (stat.st_size, stat.st_mtime_ns)
+
+
+def changed_paths(before, after):
+    changed = set()
+    for path, state in after.items():
+        if before.get(path) != state:
+            changed.add(path)
+    for path in before:
+        if path not in after:
+            changed.add(path)
+    return changed
+
+
+def wait_for_changes(paths, files, interval=0.1, debounce=0.05):
+    # Polls until something changes, then keeps collecting changes until
+    # the paths have been quiet for the debounce period, so that saving a
+    # batch of files rebuilds once. Returns the changed paths and the new
+    # snapshot to pass back in next time.
+    changed = set()
+    quiet_since = None
+    scan_time = 0.0
+    while True:
+        delay = interval if not changed else min(interval, debounce)
+        # Each poll stats every file; on a big tree that takes long enough
+        # that polling flat out would keep a core busy.
+        time.sleep(max(delay, 2 * scan_time))
+        start = time.monotonic()
+        current = snapshot(paths)
+        now = time.monotonic()
+        scan_time = now - start
+        new_changes = changed_paths(files, current)
+        files = current
+        if new_changes:
+            changed |= new_changes
+            quiet_since = now
+        elif changed and now - quiet_since >= debounce:
+            return changed, files